@@ -2,14 +2,14 @@ import os
 import sys
 import time
 import json
-import queue
 import threading
 import base64
 
 import cv2
 import numpy as np
 
-from tools.grabscreen import GrabScreen
+from tools.frame_source import create_frame_source
+from tools.buffer_pool import BufferPool
 from tools.image_processing import create_error_img
 from application.app_state import AppState
 from tools.logger import LogManager
@@ -17,18 +17,26 @@ from tools.key_listener import KeyListener
 from tools.window import set_window_style
 from tools.config_loader import ConfigLoader
 from application.detector import ImageDetector
-from application.scene_context import SceneContext
+from application.frame_context import FrameContext
+from application.pipeline import LatestFrameBuffer
+from application.metrics import Metrics
+from application.profiler import FrameProfiler
+from application.process_backend import ProcessDetectBackend
+from application.scheduler import AdaptiveScheduler
+from application.scene_context import SceneContext, LazyFounds
+from application.scene_graph import SceneGraph
+from application.scenes.scene_registry import scene_state_classes
 
 class yysManager:
-    def __init__(self):
+    def __init__(self, scene_graph):
         self.logger = LogManager(name="yysManager")
-        self.scene_context = SceneContext()
+        self.scene_context = SceneContext(scene_graph)
         
-    def scene_update(self, founds):
+    def scene_update(self, founds, frame=None):
         """
         场景更新
         """
-        self.scene_context.update(founds)
+        self.scene_context.update(founds, frame)
 
     def get_scene_name(self):
         """
@@ -36,25 +44,67 @@ class yysManager:
         """
         return self.scene_context.state.name_en
     
+    def get_scene_key(self):
+        """
+        获取当前场景的检测频率调度键
+        """
+        return self.scene_context.state.schedule_key()
+
     def get_scene_targets(self):
         """
         获取当前场景目标
         """
         return self.scene_context.state.targets
-        
+
+
+class GameInstance:
+    """
+    单个游戏窗口(或回放来源)：独立的采集、场景状态、检测调度和统计，
+    模板和匹配线程池由所有实例共用
+    """
+    def __init__(self, name, frame_source, scene_graph, queue_size, metrics, scheduler=None):
+        self.name = name
+        self.logger = LogManager(name=f"app.{name}")
+        self.frame_source = frame_source
+        self.manager = yysManager(scene_graph)
+        # 采集 -> 检测 -> 渲染 流水线，缓冲满时丢弃最旧的帧
+        self.capture_buffer = LatestFrameBuffer(queue_size)
+        self.result_buffer = LatestFrameBuffer(queue_size)
+        self.metrics = metrics
+        self.scheduler = scheduler
+        self.state = AppState.NOT_FOUND_WINDOW
+        self.last_origin = None
+        self.fps = 0
+        self.fps_text = f'FPS: {self.fps}'
+        self.scene_text = "unknown"
+        self.stage_text = ""
+
+    def close(self):
+        """
+        关闭缓冲和调度，唤醒等待中的线程
+        """
+        if self.scheduler is not None:
+            self.scheduler.close()
+        self.capture_buffer.close()
+        self.result_buffer.close()
+
                     
 class Application:
     """
     应用类
     """
-    def __init__(self, config_path):
+    def __init__(self, config_path, source_config=None, headless=None, profile_frames=None):
         self.logger = LogManager(name="app")
         self.config_loader = ConfigLoader(config_path)
-        self.grab = GrabScreen()
         self.key_listener = KeyListener(self)
-        self.manager = yysManager()
         
         self.target_window_title = self.config_loader.get("target_window_title")
+        # 命令行指定的帧来源优先于配置文件中的实例列表
+        instance_configs = self.instance_configs(source_config)
+        # 采集和图像处理复用的帧缓冲池，缓冲在最后一个阶段释放后才被复用，深度只限制保留的空闲缓冲数
+        queue_size = self.config_loader.get("pipeline_queue_size", 1)
+        pool_depth = max(self.config_loader.get("buffer_pool_depth", 8), len(instance_configs) * (queue_size * 2 + 4))
+        self.buffer_pool = BufferPool(pool_depth)
         self.hook_window_title = self.config_loader.get("hook_window_title")
         self.new_width = self.config_loader.get("new_width")
         self.new_height = self.config_loader.get("new_height")
@@ -64,19 +114,104 @@ class Application:
         self.save_img_name = self.config_loader.get("save_img_name")
         template_dir = self.config_loader.get("template_dir")
         template_config = self.config_loader.get("template_config")
+        template_bundle = self.config_loader.get("template_bundle")
+        detect_workers = self.config_loader.get("detect_workers", 4)
+        roi_cache = self.config_loader.get("roi_cache", True)
+        tracking = self.config_loader.get("tracking")
+        self.lazy_detection = self.config_loader.get("lazy_detection", False)
+        # 窗口不大于基准分辨率时在原生分辨率下匹配，模板按分辨率缩放一次，不再逐帧缩放截图。
+        # 缩小后的文字类模板得分会下降(如 battle_clickContinue_tag 在 0.75 倍时低于阈值)，默认关闭
+        self.native_resolution = self.config_loader.get("native_resolution", False)
+        # 无界面模式只做检测和场景更新，不生成调试视图也不创建预览窗口
+        self.headless = self.config_loader.get("headless", False) if headless is None else headless
+        # 预览窗口的刷新帧率，0 表示每个检测结果都刷新
+        self.preview_fps = self.config_loader.get("preview_fps", 15)
+        scheduler_config = self.config_loader.get("scheduler", {})
         
         self.running = True
         self.style_set = False
         self.current_index = 0
-        self.fps = 0
-        self.fps_text = f'FPS: {self.fps}'
-        self.scene_text = "unknown"
-        self.frame_timestamps = queue.Queue()
-        self.state = AppState.NOT_FOUND_WINDOW
-        self.detector = ImageDetector(template_dir, template_config, self.new_width, self.new_height)
+        # 预览窗口显示的实例
+        self.preview_index = 0
+        self.preview_visible = True
+        self.img_show = None
+        # 各阶段及各模板的滚动耗时统计，每个实例一组，渲染统计属于应用
+        metrics_config = self.config_loader.get("metrics", {})
+        self.metrics = Metrics(metrics_config.get("window", 512))
+        self.metrics_path = metrics_config.get("json_path")
+        self.metrics_port = metrics_config.get("http_port", 0)
+        self.metrics_host = metrics_config.get("http_host", "127.0.0.1")
+        # 按键或启动参数触发的性能剖析，时间片段来自各阶段的耗时统计
+        profiling_config = self.config_loader.get("profiling", {})
+        self.profiler = FrameProfiler(profiling_config.get("output_dir", "log"), profiling_config.get("frames", 120))
+        self.metrics.tracer = self.profiler
+        if profile_frames is None and profiling_config.get("on_start", False):
+            profile_frames = self.profiler.frames
+        if profile_frames:
+            self.profiler.request(profile_frames)
+        # 所有实例共用同一份已解码的模板和匹配线程池
+        self.detector = ImageDetector(template_dir, template_config, self.new_width, self.new_height,
+                                      template_bundle, detect_workers, self.buffer_pool, roi_cache, tracking,
+                                      self.metrics)
+        # 场景图在启动时编译，各场景按优先级排序的切换规则和检测目标只计算一次
+        self.scene_graph = SceneGraph(self.config_loader.get("scene_graph", "static/data/scene_graph.json"),
+                                      scene_state_classes)
+        self.scene_graph.compile(self.detector)
+        self.instances = []
+        for instance_config in instance_configs:
+            name = instance_config["name"]
+            frame_source = create_frame_source(instance_config.get("frame_source"),
+                                               instance_config.get("target_window_title", self.target_window_title),
+                                               self.buffer_pool)
+            # 按场景调整检测频率，画面稳定时降低采集和检测的CPU占用
+            scheduler = AdaptiveScheduler(scheduler_config) if scheduler_config.get("enabled", False) else None
+            self.instances.append(GameInstance(name, frame_source, self.scene_graph, queue_size,
+                                               self.metrics.child(name), scheduler))
+        # 可选的进程池检测后端，帧通过共享内存传给工作进程
+        backend_config = self.config_loader.get("detect_backend", {})
+        self.process_backend = None
+        if backend_config.get("type", "thread") == "process":
+            # 每个实例固定由一个工作进程处理，默认进程数取实例数与CPU核数中的较小值
+            workers = backend_config.get("workers", 0) or min(len(self.instances), os.cpu_count() or 1)
+            # 每个实例最多一帧在途，槽位在结果回调之后才释放，留出一倍余量
+            slots = backend_config.get("slots", 0) or len(self.instances) * 2
+            self.process_backend = ProcessDetectBackend(
+                (template_dir, template_config, self.new_width, self.new_height, template_bundle),
+                {"roi_cache": roi_cache, "tracking": tracking}, workers, slots, self.native_resolution)
+            if self.lazy_detection:
+                self.logger.info("进程池检测后端一次匹配场景的全部目标，lazy_detection 不生效")
+        # 检测线程轮询各实例的起始位置
+        self.round_start = 0
+        self.frame_ready = threading.Event()
         self.setup_directories()
 
-        self.logger.info("应用程序初始化，配置文件路径：%s", config_path)
+        self.logger.info("应用程序初始化，配置文件路径：%s，实例：%s", config_path,
+                         [instance.name for instance in self.instances])
+
+    def instance_configs(self, source_config=None):
+        """
+        读取实例列表，每个实例对应一个游戏窗口或回放来源。
+        未配置 instances 时使用 target_window_title 和 frame_source 作为唯一实例。
+
+        Args:
+            source_config (dict, optional): 命令行指定的帧来源，指定时只运行这一个实例
+
+        Returns:
+            list: [{"name": 实例名, "target_window_title": 窗口标题, "frame_source": 帧来源配置}, ...]
+        """
+        if source_config:
+            return [{"name": "main", "frame_source": source_config}]
+        instances = self.config_loader.get("instances") or [{"name": "main",
+                                                             "frame_source": self.config_loader.get("frame_source")}]
+        configs = []
+        for index, instance in enumerate(instances):
+            config = dict(instance)
+            config.setdefault("name", f"instance{index}")
+            configs.append(config)
+        names = [config["name"] for config in configs]
+        if len(set(names)) != len(names):
+            raise ValueError(f"实例名称重复：{names}")
+        return configs
     
     def run(self):
         """
@@ -84,88 +219,328 @@ class Application:
         """
         listener_thread = threading.Thread(target=self.key_listener.listener_start)
         fps_thread = threading.Thread(target=self.cal_fps)
-        scene_thread = threading.Thread(target=self.scene_update)
+        if self.metrics_port:
+            self.metrics.serve(self.metrics_port, self.metrics_host)
+        capture_threads = [threading.Thread(target=self.capture_loop, args=(instance,), name=f"capture-{instance.name}")
+                           for instance in self.instances]
+        detect_loop = self.detect_loop if self.process_backend is None else self.process_detect_loop
+        detect_thread = threading.Thread(target=detect_loop, name="detect")
         
         listener_thread.start()
         fps_thread.start()
-        scene_thread.start()
+        for capture_thread in capture_threads:
+            capture_thread.start()
+        detect_thread.start()
         
+        try:
+            # 渲染阶段在主线程消费检测结果
+            if self.headless:
+                self.headless_loop()
+            else:
+                self.render_loop()
+        except Exception as e:
+            self.logger.error("主循环报错: %s", e)
+            self.stop()
+            
+        self.key_listener.stop()
+        listener_thread.join()
+        for capture_thread in capture_threads:
+            capture_thread.join()
+        detect_thread.join()
+        fps_thread.join()
+        self.detector.close()
+        if self.process_backend is not None:
+            self.process_backend.close()
+        for instance in self.instances:
+            instance.frame_source.close()
+        if not self.headless:
+            cv2.destroyAllWindows()
+        self.metrics.close()
+        if self.metrics_path:
+            self.export_metrics()
+        for instance in self.instances:
+            self.logger.info("[%s] 场景切换触发统计: %s", instance.name, instance.manager.scene_context.decision_stats())
+        self.logger.info("程序退出")
+
+    def capture_loop(self, instance):
+        """
+        采集阶段：每个实例一个线程，读取帧并放入该实例的最新帧缓冲
+        """
+        frame_source = instance.frame_source
         try:
             while self.running:
+                # 实时来源按调度的检测频率采集，回放来源不限速
+                if instance.scheduler is not None and frame_source.live:
+                    instance.scheduler.wait()
                 # 获取原始图像
-                img_origin = self.grab.grab_window(self.target_window_title)
+                start = time.perf_counter()
+                img_origin = frame_source.read()
                 
+                if img_origin is None and frame_source.exhausted:
+                    instance.logger.info("帧来源已回放结束")
+                    # 关闭采集缓冲，剩余的帧由检测线程处理完后再退出
+                    instance.capture_buffer.close()
+                    self.frame_ready.set()
+                    break
                 if img_origin is None:
-                    self.state = AppState.NOT_FOUND_WINDOW if self.state != AppState.NOT_FOUND_WINDOW else self.state
-                    self.logger.log_error_once("未找到目标窗口")
-                    img_origin = create_error_img(self.new_width, self.new_height, 'WINDOW NOT FOUND')
-                    self.img_show = [img_origin]
-                    self.current_index = 0
+                    instance.state = AppState.NOT_FOUND_WINDOW if instance.state != AppState.NOT_FOUND_WINDOW else instance.state
+                    instance.logger.log_error_once("未找到目标窗口")
+                    time.sleep(0.1)
+                    continue
+                if instance.state == AppState.NOT_FOUND_WINDOW:
+                    instance.state = AppState.RUNNING
+                instance.logger.clear_error_message("未找到目标窗口")  # 重置error
+                instance.last_origin = img_origin
+                instance.metrics.observe("capture", time.perf_counter() - start - frame_source.last_wait)
+                instance.capture_buffer.put(img_origin, block=not frame_source.live)
+                self.frame_ready.set()
+        except Exception as e:
+            instance.logger.error("采集线程报错: %s", e)
+            self.stop()
+
+    def detect_loop(self):
+        """
+        检测阶段：轮流处理各实例的最新一帧，每轮每个实例最多一帧，并更新场景
+        """
+        try:
+            while self.running:
+                self.frame_ready.clear()
+                processed = False
+                count = len(self.instances)
+                # 每轮换一个起始实例，避免排在前面的实例总是先被处理
+                for offset in range(count):
+                    instance = self.instances[(self.round_start + offset) % count]
+                    img_origin = instance.capture_buffer.get(timeout=0)
+                    if img_origin is None or instance.state != AppState.RUNNING:
+                        continue
+                    self.detect_frame(instance, img_origin)
+                    processed = True
+                self.round_start = (self.round_start + 1) % count
+                if not processed:
+                    if self.replay_drained():
+                        break
+                    self.frame_ready.wait(0.1)
+        except Exception as e:
+            self.logger.error("检测线程报错: %s", e)
+        finally:
+            self.profiler.finish()
+            self.stop()
+
+    def replay_drained(self):
+        """
+        全部实例回放结束且采集到的帧都已检测
+        """
+        return all(instance.capture_buffer.drained for instance in self.instances)
+
+    def detect_frame(self, instance, img_origin):
+        """
+        检测一个实例的一帧，并更新该实例的场景
+        """
+        self.profiler.begin_frame()
+        metrics = instance.metrics
+        start = time.perf_counter()
+        frame = FrameContext(img_origin, self.new_width, self.new_height, self.buffer_pool, metrics, instance.name,
+                             self.native_resolution)
+        targets = instance.manager.get_scene_targets()
+        # self.logger.debug(f"targets: {targets}")
+        if self.lazy_detection:
+            # 目标按优先级提前在线程池中并行匹配，场景逐个询问，决定切换后尚未开始的匹配被取消
+            founds = LazyFounds(self.detector, frame, targets)
+            # 按需匹配时场景更新耗时包含等待模板匹配
+            try:
+                with metrics.timer("scene_update"):
+                    instance.manager.scene_update(founds, frame)
+            finally:
+                founds.finish()
+            results = founds.results
+        else:
+            results = self.detector.detect_many(frame, targets)
+            founds = [target for target, result in results.items() if result != None]
+            with metrics.timer("scene_update"):
+                instance.manager.scene_update(founds, frame)
+        self.finish_frame(instance, frame, results, start)
+
+    def finish_frame(self, instance, frame, results, start):
+        """
+        场景更新之后：刷新场景名、检测调度和统计，并把结果交给渲染阶段
+        """
+        instance.scene_text = instance.manager.get_scene_name()
+        if instance.scheduler is not None:
+            instance.scheduler.update(instance.manager.get_scene_key(), frame.origin)
+        instance.metrics.observe("detect", time.perf_counter() - start)
+        instance.result_buffer.put((frame, results))
+        self.profiler.end_frame()
+
+    def process_detect_loop(self):
+        """
+        进程池检测：轮流把各实例的最新一帧提交给工作进程，每个实例同时最多一帧在途，
+        保证场景按帧的顺序更新；不同实例的帧在多个进程中并行匹配
+        """
+        # 实例名 -> (实例, Future, 原始图像, 开始时间)
+        pending = {}
+        # 实例名 -> 没有空闲共享内存槽而未能提交的帧，下一轮优先重新提交
+        held = {}
+        try:
+            while self.running:
+                self.frame_ready.clear()
+                count = len(self.instances)
+                for offset in range(count):
+                    instance = self.instances[(self.round_start + offset) % count]
+                    if instance.name in pending:
+                        continue
+                    img_origin = held.pop(instance.name, None)
+                    if img_origin is None:
+                        img_origin = instance.capture_buffer.get(timeout=0)
+                    if img_origin is None or instance.state != AppState.RUNNING:
+                        continue
+                    start = time.perf_counter()
+                    future = self.process_backend.submit(img_origin, instance.name,
+                                                         instance.manager.get_scene_targets())
+                    if future is None:
+                        # 帧已从采集缓冲取出，保留到有空闲槽时再提交，回放时不丢帧
+                        held[instance.name] = img_origin
+                        continue
+                    # 匹配完成后唤醒检测线程
+                    future.add_done_callback(lambda _: self.frame_ready.set())
+                    pending[instance.name] = (instance, future, img_origin, start)
+                self.round_start = (self.round_start + 1) % count
+
+                done = [name for name, item in pending.items() if item[1].done()]
+                for name in done:
+                    instance, future, img_origin, start = pending.pop(name)
+                    self.finish_process_frame(instance, img_origin, future.result(), start)
+                if not done:
+                    if not pending and not held and self.replay_drained():
+                        break
+                    self.frame_ready.wait(0.1)
+        except Exception as e:
+            self.logger.error("检测线程报错: %s", e)
+        finally:
+            self.profiler.finish()
+            self.stop()
+
+    def finish_process_frame(self, instance, img_origin, result, start):
+        """
+        处理工作进程返回的匹配结果并更新场景
+        """
+        self.profiler.begin_frame()
+        results, timings = result
+        metrics = instance.metrics
+        for name, group, duration in timings:
+            metrics.observe(name, duration, group)
+        # 主进程中的帧上下文只用于预览渲染，匹配分辨率与工作进程一致
+        frame = FrameContext(img_origin, self.new_width, self.new_height, self.buffer_pool, metrics, instance.name,
+                             self.native_resolution)
+        founds = [target for target, result in results.items() if result != None]
+        with metrics.timer("scene_update"):
+            instance.manager.scene_update(founds, frame)
+        self.finish_frame(instance, frame, results, start)
+
+    @property
+    def preview_instance(self):
+        """
+        预览窗口当前显示的实例
+        """
+        return self.instances[self.preview_index % len(self.instances)]
+
+    def render_loop(self):
+        """
+        渲染阶段：按预览帧率取最新检测结果的快照，在自己的图像副本上绘制并刷新预览窗口。
+        检测线程只向结果缓冲放入数据，不会等待界面调用
+        """
+        interval = 1 / self.preview_fps if self.preview_fps > 0 else 0
+        next_time = time.perf_counter()
+        while self.running:
+            instance = self.preview_instance
+            item = instance.result_buffer.get(timeout=0.05)
+            if instance.state == AppState.NOT_FOUND_WINDOW:
+                if self.preview_visible:
+                    self.img_show = create_error_img(self.new_width, self.new_height, 'WINDOW NOT FOUND')
+            elif item is not None:
+                frame, results = item
+                # 预览隐藏时不生成任何调试视图
+                if self.preview_visible:
+                    with self.metrics.timer("render"):
+                        self.img_show = self.render(instance, frame, results)
                 else:
-                    if self.state == AppState.NOT_FOUND_WINDOW:
-                        self.state = AppState.RUNNING
-                    self.logger.clear_error_message("未找到目标窗口")  # 重置error
-                    if self.state == AppState.RUNNING:
-                        self.img_show = self.detector.process(img_origin)
-                        
-                        founds = []
-                        targets = self.manager.get_scene_targets()
-                        # self.logger.debug(f"targets: {targets}")
-                        for target in targets:
-                            result = self.detector.detect(img_origin, target)
-                            if result != None:
-                                founds.append(target)
-                                # 原始图像的尺寸
-                                orig_width = img_origin.shape[1]
-                                orig_height = img_origin.shape[0]
-
-                                # 计算缩放因子
-                                scale_x = self.new_width / orig_width
-                                scale_y = self.new_height / orig_height
-
-                                # 计算映射后的坐标
-                                mapped_top_left = (int(result[0][0] * scale_x), int(result[0][1] * scale_y))
-                                mapped_bottom_right = (int(result[1][0] * scale_x), int(result[1][1] * scale_y))
-
-                                cv2.rectangle(self.img_show[self.current_index], mapped_top_left, mapped_bottom_right, (0, 0, 255), 1)
-                               
-                        self.manager.scene_update(founds)
-                        self.scene_text = self.manager.get_scene_name()
-
-                        # 轮廓检测
-                        # contours, _ = cv2.findContours(img_canny, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
-                        # for cnt in contours:
-                        #     cv2.drawContours(img_contour, cnt, -1, (0,255,0), 1)
-                    # 添加帧率信息
-                    cv2.putText(self.img_show[self.current_index], self.fps_text, (5, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
-                    right_margin = 10
-                    (text_width, text_height), _ = cv2.getTextSize(self.scene_text, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
-                    start_x = self.img_show[self.current_index].shape[1] - text_width - right_margin
-                    start_x = max(0, start_x)
-                    # 在图片上绘制文本
-                    cv2.putText(self.img_show[self.current_index], self.scene_text, (start_x, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+                    self.img_show = None
 
+            if self.preview_visible and self.img_show is not None:
                 # 创建并显示调试窗口，使用新的分辨率
                 if not self.style_set:
                     cv2.namedWindow(self.hook_window_title, cv2.WINDOW_NORMAL)
                     cv2.resizeWindow(self.hook_window_title, self.new_width, self.new_height)
                     set_window_style(self.transparency, self.hook_window_title)
                     self.style_set = True
-                
-                cv2.imshow(self.hook_window_title, self.img_show[self.current_index])
-                # 图片刷新后，向队列发送当前时间戳
-                self.frame_timestamps.put(time.time())
-                cv2.waitKey(1)
-                
-        except Exception as e:
-            self.logger.error("主循环报错: %s", e)
-            self.running = False
-            
-        listener_thread.join()
-        fps_thread.join()
-        scene_thread.join()
-        cv2.destroyAllWindows()
-        self.logger.info("程序退出")
+
+                with self.metrics.timer("imshow"):
+                    cv2.imshow(self.hook_window_title, self.img_show)
+            elif self.style_set:
+                cv2.destroyWindow(self.hook_window_title)
+                self.style_set = False
+            # 按预览帧率等待，等待期间由 waitKey 处理窗口事件
+            delay = 1
+            if interval:
+                now = time.perf_counter()
+                next_time = max(next_time + interval, now)
+                delay = max(1, int((next_time - now) * 1000))
+            cv2.waitKey(delay)
+
+    def render(self, instance, frame, results):
+        """
+        生成带标注的预览图像，视图索引和检测结果在开始时取快照
+
+        Returns:
+            np.ndarray: 预览图像副本
+        """
+        index = self.current_index
+        results = dict(results)
+        view = self.detector.process(frame, index)
+        # 调试视图可能是帧缓存中的图像，复制后再绘制，不修改检测使用的数据
+        img = self.buffer_pool.acquire(view.shape, view.dtype)
+        np.copyto(img, view)
+        self.draw_overlay(img, instance, frame, results)
+        return img
+
+    def headless_loop(self):
+        """
+        无界面模式：检测结果不再消费，定期输出各实例的阶段吞吐
+        """
+        last_report = time.perf_counter()
+        while self.running:
+            time.sleep(0.1)
+            now = time.perf_counter()
+            if now - last_report >= 10:
+                for instance in self.instances:
+                    instance.logger.info("%s | %s | %s", instance.fps_text, instance.stage_text, instance.scene_text)
+                last_report = now
+
+    def draw_overlay(self, img, instance, frame, results):
+        """
+        在预览图像上绘制匹配框、帧率和场景信息
+        """
+        for target, result in results.items():
+            if result != None:
+                # 匹配结果位于帧的匹配分辨率下，映射到预览图像
+                mapped_top_left = frame.to_preview(result[0])
+                mapped_bottom_right = frame.to_preview(result[1])
+
+                cv2.rectangle(img, mapped_top_left, mapped_bottom_right, (0, 0, 255), 1)
+
+        # 轮廓检测
+        # contours, _ = cv2.findContours(img_canny, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+        # for cnt in contours:
+        #     cv2.drawContours(img_contour, cnt, -1, (0,255,0), 1)
+        # 添加帧率信息
+        cv2.putText(img, instance.fps_text, (5, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+        cv2.putText(img, instance.stage_text, (5, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 0), 1)
+        scene_text = instance.scene_text if len(self.instances) == 1 else f"{instance.name}: {instance.scene_text}"
+        right_margin = 10
+        (text_width, text_height), _ = cv2.getTextSize(scene_text, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+        start_x = img.shape[1] - text_width - right_margin
+        start_x = max(0, start_x)
+        # 在图片上绘制文本
+        cv2.putText(img, scene_text, (start_x, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
     
     def find_root_path(self, current_dir):
         """
@@ -193,79 +568,105 @@ class Application:
 
     def cal_fps(self):
         """
-        fps计算
+        每秒根据滚动统计刷新各实例的帧率和各阶段信息
         """
-        last_frame_time = None
         while self.running:
             time.sleep(1)
-            if self.state == AppState.NOT_FOUND_WINDOW or self.state == AppState.STOPPED:
-                continue
-            
-            try:
-                # 从队列中获取时间戳，最多等待一定时间
-                current_frame_time = self.frame_timestamps.get(timeout=0.1)
-                
-                if last_frame_time is not None:
-                    time_difference = current_frame_time - last_frame_time
-                    if time_difference != 0:
-                        self.fps = 1 / time_difference
-                        self.fps_text = f'FPS: {self.fps:.2f}'
-                last_frame_time = current_frame_time
-                self.logger.clear_error_message("帧时间戳队列为空，无法计算 FPS。")
-            except queue.Empty:
-                self.logger.log_debug_once("帧时间戳队列为空，无法计算 FPS。")
-                continue
+            cache_stats = self.detector.roi_cache_stats()
+            for instance in self.instances:
+                metrics = instance.metrics
+                instance.stage_text = (f"cap {metrics.rate('capture'):.1f} det {metrics.rate('detect'):.1f} "
+                                       f"render {self.metrics.rate('render'):.1f} "
+                                       f"drop {instance.capture_buffer.dropped}/{instance.result_buffer.dropped} "
+                                       f"roi {cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']}")
+                if instance.scheduler is not None:
+                    instance.stage_text += f" poll {instance.scheduler.rate():.1f}"
+                if instance.state == AppState.NOT_FOUND_WINDOW or instance.state == AppState.STOPPED:
+                    continue
+                # 帧率为最近一秒内处理完成的帧数
+                instance.fps = metrics.rate("detect")
+                instance.fps_text = f'FPS: {instance.fps:.2f}'
 
-    def scene_update(self):
+    def toggle_profiling(self):
         """
-        更新场景
+        开始剖析接下来的若干帧，剖析中再次触发时提前结束
         """
-        while self.running:
-            time.sleep(1)
-            if self.state == AppState.NOT_FOUND_WINDOW or self.state == AppState.STOPPED:
-                continue
-            try:
-                self.scene_text = 'no-scene'
-            except:
-                continue
+        self.profiler.request()
+
+    def export_metrics(self):
+        """
+        导出性能统计到JSON文件
+        """
+        path = self.metrics_path or "log/metrics.json"
+        try:
+            self.metrics.export_json(path)
+        except OSError as e:
+            self.logger.error("导出性能统计失败: %s", e)
     
     def decrease_index(self):
         """
         减少索引
         """
-        self.current_index = (self.current_index - 1) % len(self.img_show)
+        self.current_index = (self.current_index - 1) % self.detector.view_count()
     
     def increase_index(self):
         """
         增加索引
         """
-        self.current_index = (self.current_index + 1) % len(self.img_show)
+        self.current_index = (self.current_index + 1) % self.detector.view_count()
+
+    def next_instance(self):
+        """
+        预览窗口切换到下一个实例
+        """
+        self.preview_index = (self.preview_index + 1) % len(self.instances)
+        self.logger.info("预览实例：%s", self.preview_instance.name)
         
+    def toggle_preview(self):
+        """
+        切换预览窗口显示，隐藏时不生成调试视图
+        """
+        if self.headless:
+            self.logger.info("无界面模式下没有预览窗口")
+            return
+        self.preview_visible = not self.preview_visible
+        self.logger.info("预览窗口%s", "显示" if self.preview_visible else "隐藏")
+
     def save_current_image(self):
         """
-        保存当前图片
+        保存预览实例的当前图片
         """
-        img_origin = self.grab.grab_window(self.target_window_title)
-        save_path = self.path_to_images + "\\" + self.save_img_name
+        instance = self.preview_instance
+        img_origin = instance.last_origin
+        if img_origin is None:
+            self.logger.warn("未获取到图像，无法保存")
+            return
+        if img_origin.ndim == 3 and img_origin.shape[2] == 4:
+            img_origin = cv2.cvtColor(img_origin, cv2.COLOR_BGRA2BGR)
+        save_name = self.save_img_name if len(self.instances) == 1 else f"{instance.name}_{self.save_img_name}"
+        save_path = os.path.join(self.path_to_images, save_name)
         cv2.imwrite(save_path, img_origin)
         self.logger.info(f"截取图片保存至 {save_path}")
     
     def toggle_state(self):
         """
-        切换运行状态
+        切换所有实例的运行状态
         """
-        if self.state == AppState.NOT_FOUND_WINDOW:
-            self.logger.warn("未找到目标窗口，无法开始运行")
-        elif self.state == AppState.RUNNING:
-            self.logger.info("停止运行")
-            self.state = AppState.STOPPED
-        elif self.state == AppState.STOPPED:
-            self.logger.info("开始运行")
-            self.state = AppState.RUNNING
+        for instance in self.instances:
+            if instance.state == AppState.NOT_FOUND_WINDOW:
+                instance.logger.warn("未找到目标窗口，无法开始运行")
+            elif instance.state == AppState.RUNNING:
+                instance.logger.info("停止运行")
+                instance.state = AppState.STOPPED
+            elif instance.state == AppState.STOPPED:
+                instance.logger.info("开始运行")
+                instance.state = AppState.RUNNING
     
     def stop(self):
         """
         停止程序
         """
         self.running = False
-    
+        for instance in self.instances:
+            instance.close()
+        self.frame_ready.set()
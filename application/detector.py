@@ -1,147 +1,592 @@
+import zlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
 import numpy as np
-import json
-import base64
-import os
 
 from tools.logger import LogManager
-from tools.image_processing import stack_images
+from application.template_store import TemplateStore
+from application.frame_context import FrameContext
+
+
+def merge_regions(regions):
+    """
+    合并相互重叠的矩形区域，直到没有重叠为止。
+
+    Args:
+        regions (list): [(start_x, start_y, end_x, end_y), ...]
+
+    Returns:
+        list: 合并后的区域
+    """
+    merged = [tuple(region) for region in regions]
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(merged)):
+            for j in range(i + 1, len(merged)):
+                a, b = merged[i], merged[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    merged[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    del merged[j]
+                    changed = True
+                    break
+            if changed:
+                break
+    return merged
 
 class ImageDetector:
     """
     图像处理类，用于处理和转换图像。
     """
-    def __init__(self, template_dir, config_path, new_width, new_height):
+    # 调试视图，按 a/d 键切换
+    VIEWS = ("resize", "gray", "blur", "canny", "contour", "stack")
+    STACK_SCALE = 0.6
+    # 匹配阈值与搜索区域的额外宽高，模板未单独配置时使用
+    THRESHOLD = 0.8
+    PADDING = 20
+    # 检测区域总面积超过整帧的该比例时，直接生成整帧匹配图像
+    FULL_FRAME_RATIO = 0.5
+    # 搜索区域面积达到模板面积的该倍数时才使用金字塔匹配
+    PYRAMID_MIN_AREA_RATIO = 4
+    # 按分辨率缩放的模板最多保留的分辨率数，多个实例窗口尺寸不同时各占一项
+    RESOLUTION_CACHE = 4
+
+    def __init__(self, template_dir, config_path, new_width, new_height, bundle_path=None, max_workers=4,
+                 buffer_pool=None, roi_cache=False, tracking=None, metrics=None):
         self.logger = LogManager(name="detector")
+        # 分模板的匹配耗时统计，为None时不统计
+        self.metrics = metrics
+        # 匹配结果等中间数组从缓冲池复用，为None时每次由cv2分配
+        self.buffer_pool = buffer_pool
         self.new_width = new_width
         self.new_height = new_height
         self.template_dir = template_dir
-        self.templates = self.load_config(config_path)
+        self.template_store = TemplateStore(template_dir, config_path, bundle_path)
+        # cv2.matchTemplate 执行时会释放GIL，多个模板可在线程池中并行匹配
+        self.max_workers = max(1, max_workers)
+        # (目标组合, 宽, 高) -> 合并后的检测区域
+        self.region_plans = {}
+        # (宽, 高) -> {模板名称: 缩放到该分辨率的模板}，窗口尺寸不变时一直复用
+        self.scaled_templates = OrderedDict()
+        self.scale_lock = threading.Lock()
+        # (帧来源, 模板名称) -> (区域像素校验值, 区域坐标, 匹配结果)，区域未变化时直接复用上次结果
+        self.roi_cache_enabled = roi_cache
+        self.roi_cache = {}
+        self.roi_cache_hits = 0
+        self.roi_cache_misses = 0
+        self.stats_lock = threading.Lock()
+        # 全区域扫描模板命中后，先在上次位置附近的小窗口内搜索
+        tracking = tracking or {}
+        self.tracking_enabled = tracking.get("enabled", False)
+        self.tracking_margin = tracking.get("margin", 24)
+        self.tracking_refresh_interval = tracking.get("refresh_interval", 30)
+        # (帧来源, 模板名称) -> {"top_left": 上次位置, "frames": 连续跟踪帧数, "size": 匹配分辨率}
+        self.tracks = {}
+        self.tracking_hits = 0
+        self.tracking_misses = 0
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="detector")
+
+    def close(self):
+        """
+        关闭匹配线程池。
+        """
+        self.executor.shutdown(wait=True)
+
+    def invalidate_templates(self, name=None):
+        """
+        使模板缓存失效并重新加载。
+
+        Args:
+            name (str, optional): 模板名称，为空时重新加载全部模板
+        """
+        self.template_store.invalidate(name)
+        with self.scale_lock:
+            self.scaled_templates.clear()
+        self.region_plans.clear()
+        self.roi_cache.clear()
+        self.tracks.clear()
+
+    def roi_cache_stats(self):
+        """
+        区域缓存的命中与未命中次数
+        """
+        with self.stats_lock:
+            return {"hits": self.roi_cache_hits, "misses": self.roi_cache_misses}
+
+    def tracking_stats(self):
+        """
+        跟踪窗口的命中与回退到完整区域的次数
+        """
+        with self.stats_lock:
+            return {"hits": self.tracking_hits, "misses": self.tracking_misses, "tracking": len(self.tracks)}
+
+    def threshold(self, template):
+        """
+        模板的匹配阈值
+        """
+        return self.THRESHOLD if template.threshold is None else template.threshold
+
+    def padding(self, template):
+        """
+        模板搜索区域的额外宽高
+        """
+        return self.PADDING if template.padding is None else template.padding
 
-    def load_config(self, config_path):
+    def templates_for(self, width, height):
         """
-        加载配置文件中的模板信息。
+        缩放到指定分辨率的全部模板，每个分辨率只缩放一次，窗口尺寸变化后按新分辨率重新缩放。
+
+        Args:
+            width (int): 匹配分辨率宽度
+            height (int): 匹配分辨率高度
+
+        Returns:
+            dict: 模板名称到模板的映射，基准分辨率时即模板仓库中的模板
         """
-        with open(config_path, 'r', encoding='utf-8') as file:
-            config = json.load(file)
-        return config['templates']
+        if width == FrameContext.MATCH_WIDTH and height == FrameContext.MATCH_HEIGHT:
+            return self.template_store.templates
+        key = (width, height)
+        with self.scale_lock:
+            templates = self.scaled_templates.get(key)
+            if templates is not None:
+                self.scaled_templates.move_to_end(key)
+                return templates
+            scale_x = width / FrameContext.MATCH_WIDTH
+            scale_y = height / FrameContext.MATCH_HEIGHT
+            templates = {name: template.scaled(scale_x, scale_y, self.padding(template))
+                         for name, template in self.template_store.templates.items()}
+            self.scaled_templates[key] = templates
+            if len(self.scaled_templates) > self.RESOLUTION_CACHE:
+                self.scaled_templates.popitem(last=False)
+        self.logger.info("已按分辨率 %dx%d 缩放模板 %d 个", width, height, len(templates))
+        return templates
 
-    def process(self, img_origin):
+    def template(self, frame, name):
+        """
+        获取帧的匹配分辨率下的模板，不存在时返回None。
+        """
+        return self.templates_for(frame.match_width, frame.match_height).get(name)
+
+    def tracking_window(self, template, track, region, margin):
+        """
+        以上次命中位置为中心的小搜索窗口，限制在完整搜索区域内。
         """
-        图像处理
+        x, y = track["top_left"]
+        return (max(region[0], x - margin),
+                max(region[1], y - margin),
+                min(region[2], x + template.width + margin),
+                min(region[3], y + template.height + margin))
+
+    def plan_regions(self, targets, width=FrameContext.MATCH_WIDTH, height=FrameContext.MATCH_HEIGHT):
+        """
+        计算一组目标的搜索区域并集，重叠的区域合并为一个，结果按目标组合和分辨率缓存。
+
+        Args:
+            targets (list): 模板名称列表
+            width (int): 匹配分辨率宽度
+            height (int): 匹配分辨率高度
+
+        Returns:
+            list: 匹配分辨率下的区域列表，为空表示需要整帧匹配图像
+        """
+        key = (tuple(targets), width, height)
+        plan = self.region_plans.get(key)
+        if plan is None:
+            templates = self.templates_for(width, height)
+            regions = []
+            for target in targets:
+                template = templates.get(target)
+                if template is not None:
+                    regions.append(self.search_region(template, width, height))
+            plan = merge_regions(regions)
+            area = sum((r[2] - r[0]) * (r[3] - r[1]) for r in plan)
+            if area > self.FULL_FRAME_RATIO * width * height:
+                plan = []
+            self.region_plans[key] = plan
+        return plan
+
+    def view_count(self):
+        """
+        调试视图数量
+        """
+        return len(self.VIEWS)
+
+    def process(self, frame, index=0):
+        """
+        图像处理，只生成当前显示的调试视图
         参数:
-            img_origin: 原始图像
+            frame: 当前帧上下文
+            index: 调试视图索引
         返回:
-            处理后的图像组
-        """
-        # 调整图像大小以适应新的分辨率
-        img_resize = cv2.resize(img_origin, (self.new_width, self.new_height))
-        # 图像处理
-        img_gray = cv2.cvtColor(img_resize, cv2.COLOR_BGR2GRAY)
-        img_blur = cv2.GaussianBlur(img_gray, (7,7), 1)
-        img_canny = cv2.Canny(img_blur, 50, 50)
-        img_blank = np.zeros_like(img_resize)
-        img_contour = img_resize.copy()
-        img_stack = stack_images(0.6, ([img_resize, img_gray, img_blur], [img_canny, img_contour, img_blank]))
-
-        self.img_show = [img_resize, img_gray, img_blur, img_canny, img_contour, img_stack]
-        return self.img_show
-        
-    def detect(self, img_origin, template_name):
+            处理后的图像
+        """
+        name = self.VIEWS[index % len(self.VIEWS)]
+        return getattr(self, f"view_{name}")(frame)
+
+    def view_resize(self, frame):
+        # 预览尺寸的图像由帧上下文统一缓存
+        return frame.preview
+
+    def view_gray(self, frame):
+        return frame.cached("preview_gray", lambda: cv2.cvtColor(
+            frame.preview, cv2.COLOR_BGR2GRAY, dst=frame.buffer(frame.preview.shape[:2])))
+
+    def view_blur(self, frame):
+        return frame.cached("preview_blur", lambda: cv2.GaussianBlur(
+            self.view_gray(frame), (7, 7), 1, dst=frame.buffer(frame.preview.shape[:2])))
+
+    def view_canny(self, frame):
+        return frame.cached("preview_canny", lambda: cv2.Canny(
+            self.view_blur(frame), 50, 50, edges=frame.buffer(frame.preview.shape[:2])))
+
+    def view_contour(self, frame):
+        img_contour = frame.buffer(frame.preview.shape)
+        if img_contour is None:
+            return frame.preview.copy()
+        np.copyto(img_contour, frame.preview)
+        return img_contour
+
+    def view_stack(self, frame):
+        """
+        拼接图，先缩小到拼接尺寸再处理，避免在预览分辨率下计算各视图；
+        各视图直接写入拼接图对应的格子，不再逐个分配再拼接
+        """
+        height, width = frame.preview.shape[:2]
+        cell_width = int(round(width * self.STACK_SCALE))
+        cell_height = int(round(height * self.STACK_SCALE))
+        img_stack = frame.buffer((cell_height * 2, cell_width * 3, 3))
+        if img_stack is None:
+            img_stack = np.empty((cell_height * 2, cell_width * 3, 3), np.uint8)
+
+        def cell(row, col):
+            return img_stack[row * cell_height:(row + 1) * cell_height, col * cell_width:(col + 1) * cell_width]
+
+        img_resize = cv2.resize(frame.preview, (cell_width, cell_height), dst=cell(0, 0), interpolation=cv2.INTER_AREA)
+        img_gray = cv2.cvtColor(img_resize, cv2.COLOR_BGR2GRAY, dst=frame.buffer((cell_height, cell_width)))
+        img_blur = cv2.GaussianBlur(img_gray, (7, 7), 1, dst=frame.buffer((cell_height, cell_width)))
+        img_canny = cv2.Canny(img_blur, 50, 50, edges=frame.buffer((cell_height, cell_width)))
+        cv2.cvtColor(img_gray, cv2.COLOR_GRAY2BGR, dst=cell(0, 1))
+        cv2.cvtColor(img_blur, cv2.COLOR_GRAY2BGR, dst=cell(0, 2))
+        cv2.cvtColor(img_canny, cv2.COLOR_GRAY2BGR, dst=cell(1, 0))
+        cell(1, 1)[:] = img_resize
+        cell(1, 2)[:] = 0
+        return img_stack
+
+    def detect(self, frame, template_name):
         """
         匹配指定模板。
 
         Args:
-            img_origin (_type_): 原始图像
+            frame (FrameContext): 当前帧上下文
             template_name (_type_): 指定的模板名称
         """
-        template_file = self.find_template_by_name(template_name)
-        if template_file:
-            return self.match(img_origin, template_file)
+        template = self.template(frame, template_name)
+        if template:
+            # 优先记录到帧所属实例的统计中
+            metrics = frame.metrics if frame.metrics is not None else self.metrics
+            if metrics is None:
+                return self.match(frame, template)
+            with metrics.timer(template_name, "template"):
+                return self.match(frame, template)
         else:
             self.logger.error(f"未找到[{template_name}]")
             raise ValueError(f"未找到[{template_name}]")
 
-    def find_template_by_name(self, name):
+    def prepare(self, frame, targets, prebuild=False):
         """
-        根据模板名称找到对应的文件路径。
+        为本帧设置检测区域，只截取并转换当前目标需要的区域。
+
+        Args:
+            frame (FrameContext): 当前帧上下文
+            targets (list): 模板名称列表
+            prebuild (bool): 是否立即生成区域图像，否则在首次匹配时生成
         """
-        for template in self.templates:
-            if template['name'] == name:
-                return template['file']
-        return None
-    
-    def match(self, img, json_filename):
+        regions = self.plan_regions(targets, frame.match_width, frame.match_height)
+        frame.set_regions(regions)
+        if not prebuild:
+            return
+        if regions:
+            for region in regions:
+                frame.region_image(region)
+        else:
+            frame.match_image
+
+    def detect_many(self, frame, targets):
         """
-        执行模板匹配。
+        在线程池中并行匹配多个模板。
 
         Args:
-            img (_type_): 图像
-            target_path (_type_): 模板匹配的JSON文件路径
+            frame (FrameContext): 当前帧上下文
+            targets (list): 模板名称列表
 
         Returns:
-            _type_: 匹配结果
+            dict: 模板名称到匹配结果的映射，顺序与 targets 一致，未匹配为None
         """
-        target_path = os.path.join(self.template_dir, json_filename)
-        # 读取目标图片
-        if img is None:
-            self.logger.error("无法加载图像")
-            return None
-        img = cv2.resize(img, (1136, 640))
-            
-        # 读取 JSON 数据
-        with open(target_path, 'r') as file:
-            data = json.load(file)
-            target_data = base64.b64decode(data['data'])
-            target_array = np.frombuffer(target_data, dtype=np.uint8)
-            target = cv2.imdecode(target_array, cv2.IMREAD_COLOR)
+        if not targets:
+            return {}
+        # 先在当前线程生成检测区域，避免各工作线程重复处理
+        self.prepare(frame, targets, prebuild=True)
+        if len(targets) == 1 or self.max_workers == 1:
+            return {target: self.detect(frame, target) for target in targets}
+        futures = {target: self.submit(frame, target) for target in targets}
+        return {target: future.result() for target, future in futures.items()}
+
+    def submit_many(self, frame, targets):
+        """
+        按顺序把多个模板的匹配提交到线程池，不等待结果，供按需匹配时提前并行计算。
 
+        Args:
+            frame (FrameContext): 当前帧上下文
+            targets (list): 模板名称列表，按优先级排列
+
+        Returns:
+            dict: 模板名称到 Future 的映射；单线程或目标不超过一个时为空，由调用方直接匹配
+        """
+        if len(targets) <= 1 or self.max_workers == 1:
+            self.prepare(frame, targets)
+            return {}
+        self.prepare(frame, targets, prebuild=True)
+        return {target: self.submit(frame, target) for target in targets}
+
+    def submit(self, frame, target):
+        """
+        把单个模板的匹配提交到线程池，剖析期间由剖析器在工作线程中计时。
+
+        Args:
+            frame (FrameContext): 当前帧上下文
+            target (str): 模板名称
+
+        Returns:
+            Future: 匹配结果
+        """
+        tracer = self.metrics.tracer if self.metrics is not None else None
+        if tracer is None:
+            return self.executor.submit(self.detect, frame, target)
+        return self.executor.submit(tracer.run, self.detect, frame, target)
+
+    def search_region(self, template, img_width, img_height):
+        """
+        计算模板在匹配分辨率图像中的搜索区域。
+
+        Args:
+            template (Template): 已解码的模板
+            img_width (int): 图像宽度
+            img_height (int): 图像高度
+
+        Returns:
+            tuple: (start_x, start_y, end_x, end_y)
+        """
         # 读取左上角坐标，并增加额外的宽度和高度范围
-        x, y = data['lt_x'], data['lt_y']
-        width, height = data['width'], data['height']
-        is_all_scan = data['is_all_scan']
-        extra_width, extra_height = 20, 20
-            
-        # 截取目标可能在的区域
-        if is_all_scan:
+        x, y = template.lt_x, template.lt_y
+        width, height = template.width, template.height
+        extra_width = extra_height = self.padding(template)
+
+        if template.is_all_scan:
             # 根据x, y的值调整起始点和截取的宽度、高度
-            start_x = 0 if x == 0 else x
-            start_y = 0 if y == 0 else y
-            end_x = img.shape[1] if x == 0 else x + width + extra_width
-            end_y = img.shape[0] if y == 0 else y + height + extra_height
+            end_x = img_width if x == 0 else x + width + extra_width
+            end_y = img_height if y == 0 else y + height + extra_height
+        else:
+            # 直接截取指定区域
+            end_x = x + width + extra_width
+            end_y = y + height + extra_height
+
+        # 确保不超过图像边界
+        return x, y, min(end_x, img_width), min(end_y, img_height)
 
-            # 确保不超过图像边界
-            end_x = min(end_x, img.shape[1])
-            end_y = min(end_y, img.shape[0])
+    def locate(self, frame, template):
+        """
+        在搜索区域内匹配模板，返回最高得分及其位置，不做阈值判断。
+
+        Args:
+            frame (FrameContext): 当前帧上下文
+            template (Template): 已解码的模板
 
-            # 截取图像
-            roi = img[start_y:end_y, start_x:end_x]
+        Returns:
+            tuple: (得分, 左上角, 右下角)，区域无效时返回None
+        """
+        # 读取目标图片
+        if frame is None or frame.origin is None:
+            self.logger.error("无法加载图像")
+            return None
+        # 目标可能在的区域
+        region = self.search_region(template, frame.match_width, frame.match_height)
+        threshold = self.threshold(template)
+        if not (self.tracking_enabled and template.is_all_scan):
+            return self.locate_region(frame, template, region)
+
+        key = (frame.source, template.name)
+        track = self.tracks.get(key)
+        size = (frame.match_width, frame.match_height)
+        # 窗口尺寸变化后上次位置不再有效，重新搜索完整区域
+        if track is not None and track["size"] == size and track["frames"] < self.tracking_refresh_interval:
+            # 跟踪范围随匹配分辨率缩放
+            margin = int(round(self.tracking_margin * frame.match_width / frame.MATCH_WIDTH))
+            located = self.locate_region(frame, template, self.tracking_window(template, track, region, margin))
+            if located is not None and located[0] >= threshold:
+                track["top_left"] = located[1]
+                track["frames"] += 1
+                with self.stats_lock:
+                    self.tracking_hits += 1
+                return located
+            with self.stats_lock:
+                self.tracking_misses += 1
+
+        # 未在跟踪、跟踪丢失或到达刷新间隔时搜索完整区域
+        located = self.locate_region(frame, template, region)
+        if located is not None and located[0] >= threshold:
+            self.tracks[key] = {"top_left": located[1], "frames": 0, "size": size}
         else:
-            # 直接截取指定区域，确保不超过图像边界
-            start_x = x
-            start_y = y
-            end_x = min(x + width + extra_width, img.shape[1])
-            end_y = min(y + height + extra_height, img.shape[0])
+            self.tracks.pop(key, None)
+        return located
+
+    def locate_region(self, frame, template, region):
+        """
+        在指定区域内匹配模板，区域像素未变化时复用上次结果。
+
+        Args:
+            frame (FrameContext): 当前帧上下文
+            template (Template): 已解码的模板
+            region (tuple): 匹配分辨率下的区域(start_x, start_y, end_x, end_y)
 
-            roi = img[start_y:end_y, start_x:end_x]
+        Returns:
+            tuple: (得分, 左上角, 右下角)，区域无效时返回None
+        """
+        start_x, start_y, end_x, end_y = region
+        roi = frame.match_region(start_x, start_y, end_x, end_y, template.channels)
 
-        if roi.size == 0:
+        if roi.shape[0] < template.height or roi.shape[1] < template.width:
             self.logger.error("截取的区域无效，请检查提供的坐标和图像尺寸")
             return None
-        
+
+        if not self.roi_cache_enabled:
+            return self.match_roi(roi, template, start_x, start_y)
+
+        # 区域像素与上一帧完全相同时，匹配结果也相同
+        checksum = zlib.crc32(np.ascontiguousarray(roi))
+        key = (frame.source, template.name)
+        cached = self.roi_cache.get(key)
+        if cached is not None and cached[0] == checksum and cached[1] == region:
+            with self.stats_lock:
+                self.roi_cache_hits += 1
+            return cached[2]
+        located = self.match_roi(roi, template, start_x, start_y)
+        self.roi_cache[key] = (checksum, region, located)
+        with self.stats_lock:
+            self.roi_cache_misses += 1
+        return located
+
+    def match_roi(self, roi, template, start_x, start_y):
+        """
+        在截取的区域上执行模板匹配。
+
+        Args:
+            roi (np.ndarray): 匹配分辨率下的搜索区域图像，颜色通道与模板一致
+            template (Template): 已解码的模板
+            start_x (int): 区域左上角x
+            start_y (int): 区域左上角y
+
+        Returns:
+            tuple: (得分, 左上角, 右下角)
+        """
         # cv2.imshow('debug', roi)
-        # 进行模板匹配
-        result = cv2.matchTemplate(roi, target, cv2.TM_CCOEFF_NORMED)
+        # 搜索区域远大于模板时先在缩小的图像上粗匹配，再在原分辨率下验证候选位置
+        if (template.pyramid_image is not None
+                and roi.shape[0] * roi.shape[1] >= self.PYRAMID_MIN_AREA_RATIO * template.width * template.height):
+            max_val, max_loc = self.match_pyramid(roi, template)
+        else:
+            max_val, max_loc = self.match_full(roi, template.match_image, template.method)
+
+        # 计算匹配区域的左上角和右下角坐标
+        top_left = (max_loc[0] + start_x, max_loc[1] + start_y)
+        bottom_right = (top_left[0] + template.width, top_left[1] + template.height)
+        return max_val, top_left, bottom_right
+
+    def match_full(self, roi, image, method=cv2.TM_CCOEFF_NORMED):
+        """
+        在原分辨率下匹配，得分矩阵写入缓冲池中的数组。
+        平方差匹配的得分换算为 1 - 差值，与其他方法一样越大越相似。
+
+        Returns:
+            tuple: (最高得分, 区域内的位置)
+        """
+        result = None
+        if self.buffer_pool is not None:
+            result_shape = (roi.shape[0] - image.shape[0] + 1, roi.shape[1] - image.shape[1] + 1)
+            result = self.buffer_pool.acquire(result_shape, np.float32)
+        result = cv2.matchTemplate(roi, image, method, result=result)
         min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-        
+        if method == cv2.TM_SQDIFF_NORMED:
+            return 1 - min_val, min_loc
+        return max_val, max_loc
+
+    def match_pyramid(self, roi, template):
+        """
+        金字塔匹配：缩小后粗匹配，取得分最高的若干候选，在原分辨率的小窗口内验证。
+
+        Returns:
+            tuple: (最高得分, 区域内的位置)
+        """
+        scale = template.pyramid_scale
+        small_template = template.pyramid_image
+        small_size = (int(round(roi.shape[1] * scale)), int(round(roi.shape[0] * scale)))
+        if small_size[0] < small_template.shape[1] or small_size[1] < small_template.shape[0]:
+            return self.match_full(roi, template.match_image, template.method)
+        small_dst = self.buffer_pool.acquire((small_size[1], small_size[0]) + roi.shape[2:]) if self.buffer_pool else None
+        small_roi = cv2.resize(roi, small_size, dst=small_dst, interpolation=cv2.INTER_AREA)
+        coarse = None
+        if self.buffer_pool is not None:
+            coarse_shape = (small_size[1] - small_template.shape[0] + 1, small_size[0] - small_template.shape[1] + 1)
+            coarse = self.buffer_pool.acquire(coarse_shape, np.float32)
+        coarse = cv2.matchTemplate(small_roi, small_template, template.method, result=coarse)
+        if template.method == cv2.TM_SQDIFF_NORMED:
+            np.subtract(1, coarse, out=coarse)
+
+        # 粗匹配位置映射回原分辨率后的误差范围
+        radius = int(np.ceil(1 / scale)) + 1
+        suppress_x = max(1, small_template.shape[1] // 2)
+        suppress_y = max(1, small_template.shape[0] // 2)
+        best_val, best_loc = -1.0, (0, 0)
+        for _ in range(max(1, template.pyramid_candidates)):
+            _, coarse_val, _, coarse_loc = cv2.minMaxLoc(coarse)
+            if coarse_val <= -1:
+                break
+            x = int(round(coarse_loc[0] / scale))
+            y = int(round(coarse_loc[1] / scale))
+            x0, y0 = max(0, x - radius), max(0, y - radius)
+            x1 = min(roi.shape[1], x + template.width + radius)
+            y1 = min(roi.shape[0], y + template.height + radius)
+            if x1 - x0 >= template.width and y1 - y0 >= template.height:
+                val, loc = self.match_full(roi[y0:y1, x0:x1], template.match_image, template.method)
+                if val > best_val:
+                    best_val, best_loc = val, (loc[0] + x0, loc[1] + y0)
+            # 抑制该候选附近的粗匹配得分，取下一个候选
+            coarse[max(0, coarse_loc[1] - suppress_y):coarse_loc[1] + suppress_y + 1,
+                   max(0, coarse_loc[0] - suppress_x):coarse_loc[0] + suppress_x + 1] = -1
+        return best_val, best_loc
+
+    def match(self, frame, template):
+        """
+        执行模板匹配。
+
+        Args:
+            frame (FrameContext): 当前帧上下文
+            template (Template): 已解码的模板
+
+        Returns:
+            _type_: 匹配结果，坐标位于帧的匹配分辨率下
+        """
+        located = self.locate(frame, template)
+        if located is None:
+            return None
+        max_val, top_left, bottom_right = located
+
         # 检查匹配得分是否足够高
-        if max_val < 0.8:
+        if max_val < self.threshold(template):
             # self.logger.error("未能找到匹配目标，最高匹配得分：{}".format(max_val))
             return None
 
-        # 计算匹配区域的左上角和右下角坐标
-        top_left = (max_loc[0] + x, max_loc[1] + y)
-        bottom_right = (top_left[0] + width, top_left[1] + height)
-        
         # self.logger.info(f"找到目标，匹配度：{max_val:.1f}, 结果坐标：{str(top_left)}到{str(bottom_right)}")
         return top_left, bottom_right
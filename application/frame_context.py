@@ -0,0 +1,251 @@
+import time
+from functools import cached_property
+
+import cv2
+import numpy as np
+
+# 匹配可用的颜色通道: bgr 为三通道原图，gray 为灰度，b/g/r 为单个通道(值为通道序号)
+CHANNELS = {"bgr": None, "gray": None, "b": 0, "g": 1, "r": 2}
+
+
+def convert_channels(img, channels, dst=None):
+    """
+    将BGR图像转换为匹配使用的颜色通道，bgr 时原样返回。
+
+    Args:
+        img (np.ndarray): BGR图像
+        channels (str): CHANNELS 中的名称
+        dst (np.ndarray, optional): 单通道输出缓冲
+
+    Returns:
+        np.ndarray: 转换后的图像
+    """
+    if channels == "bgr":
+        return img
+    if channels == "gray":
+        return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY, dst=dst)
+    return cv2.extractChannel(img, CHANNELS[channels], dst=dst)
+
+
+class FrameContext:
+    """
+    单帧上下文，按需计算并缓存派生图像，供检测、绘制和场景逻辑共用。
+
+    原始图像可以是BGR或未转换的BGRA截图。设置了检测区域(set_regions)时，
+    匹配只从原始图像中截取、缩放并转换这些区域，不生成整帧的匹配图像。
+
+    native 为True且原始分辨率不大于基准分辨率时，直接在原始分辨率下匹配(模板由检测器按分辨率缩放)，
+    不再缩放帧；否则先缩放到模板截取时的基准分辨率。大于基准分辨率的帧仍缩小后匹配，
+    因为匹配耗时随区域和模板的像素数一同增长，远超缩放本身的耗时。
+    """
+    # 模板截取时的基准分辨率
+    MATCH_WIDTH = 1136
+    MATCH_HEIGHT = 640
+
+    def __init__(self, origin, preview_width, preview_height, pool=None, metrics=None, source=None, native=False):
+        self.origin = origin
+        self.preview_width = preview_width
+        self.preview_height = preview_height
+        self.pool = pool
+        # 缩放及颜色转换耗时统计，为None时不统计
+        self.metrics = metrics
+        # 帧来源(实例)标识，多个实例共用检测器时区分各自的跟踪和区域缓存
+        self.source = source
+        self.native = native
+        self.cache = {}
+        self.regions = []
+
+    def buffer(self, shape, dtype=np.uint8):
+        """
+        从缓冲池获取输出缓冲，未配置缓冲池时返回None由cv2自行分配。
+        """
+        if self.pool is None:
+            return None
+        return self.pool.acquire(shape, dtype)
+
+    @property
+    def width(self):
+        """
+        原始图像宽度
+        """
+        return self.origin.shape[1]
+
+    @property
+    def height(self):
+        """
+        原始图像高度
+        """
+        return self.origin.shape[0]
+
+    @property
+    def is_native(self):
+        """
+        是否在原始分辨率下匹配
+        """
+        return self.native and self.width <= self.MATCH_WIDTH and self.height <= self.MATCH_HEIGHT
+
+    @property
+    def match_width(self):
+        """
+        匹配所在分辨率的宽度，检测区域和匹配结果的坐标都位于该分辨率下
+        """
+        return self.width if self.is_native else self.MATCH_WIDTH
+
+    @property
+    def match_height(self):
+        """
+        匹配所在分辨率的高度
+        """
+        return self.height if self.is_native else self.MATCH_HEIGHT
+
+    @property
+    def is_bgra(self):
+        """
+        原始图像是否为未转换的BGRA截图
+        """
+        return self.origin.ndim == 3 and self.origin.shape[2] == 4
+
+    def to_bgr(self, img):
+        """
+        BGRA图像转换为BGR，已是BGR时原样返回。
+        """
+        if img.ndim == 3 and img.shape[2] == 4:
+            return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR, dst=self.buffer(img.shape[:2] + (3,)))
+        return img
+
+    def observe(self, start):
+        """
+        记录从 start 开始的缩放耗时
+        """
+        if self.metrics is not None:
+            self.metrics.observe("resize", time.perf_counter() - start)
+
+    @cached_property
+    def match_image(self):
+        """
+        匹配分辨率的BGR图像，在原始分辨率下匹配时不缩放
+        """
+        start = time.perf_counter()
+        width, height = self.match_width, self.match_height
+        if self.origin.shape[1] == width and self.origin.shape[0] == height:
+            img = self.to_bgr(self.origin)
+        else:
+            shape = (height, width) + self.origin.shape[2:]
+            img = self.to_bgr(cv2.resize(self.origin, (width, height), dst=self.buffer(shape)))
+        self.observe(start)
+        return img
+
+    def set_regions(self, regions):
+        """
+        设置本帧需要检测的区域(匹配分辨率坐标)，为空时使用整帧匹配图像。
+
+        Args:
+            regions (list): [(start_x, start_y, end_x, end_y), ...]
+        """
+        self.regions = list(regions or [])
+
+    def convert(self, img, channels):
+        """
+        转换为匹配使用的颜色通道，转换耗时计入缩放
+        """
+        start = time.perf_counter()
+        img = convert_channels(img, channels, dst=self.buffer(img.shape[:2]))
+        self.observe(start)
+        return img
+
+    def region_image(self, region, channels="bgr"):
+        """
+        从原始图像中只截取、缩放并转换指定区域，结果与整帧缩放后再截取一致。
+
+        Args:
+            region (tuple): 匹配分辨率下的区域(start_x, start_y, end_x, end_y)
+            channels (str): 颜色通道，同一区域的各通道图像由BGR区域图像转换并分别缓存
+
+        Returns:
+            np.ndarray: 区域图像
+        """
+        if channels != "bgr":
+            return self.cached(("region", channels) + tuple(region),
+                               lambda: self.convert(self.region_image(region), channels))
+
+        def build():
+            start = time.perf_counter()
+            start_x, start_y, end_x, end_y = region
+            scale_x = self.width / self.match_width
+            scale_y = self.height / self.match_height
+            if scale_x == 1 and scale_y == 1:
+                img = self.origin[start_y:end_y, start_x:end_x]
+            else:
+                # 与 cv2.resize 的双线性采样对齐: src = (dst + 0.5) * scale - 0.5
+                matrix = np.float32([[scale_x, 0, (start_x + 0.5) * scale_x - 0.5],
+                                     [0, scale_y, (start_y + 0.5) * scale_y - 0.5]])
+                size = (end_x - start_x, end_y - start_y)
+                img = cv2.warpAffine(self.origin, matrix, size,
+                                     dst=self.buffer((size[1], size[0]) + self.origin.shape[2:]),
+                                     flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP,
+                                     borderMode=cv2.BORDER_REPLICATE)
+            img = self.to_bgr(img)
+            self.observe(start)
+            return img
+        return self.cached(("region",) + tuple(region), build)
+
+    def match_region(self, start_x, start_y, end_x, end_y, channels="bgr"):
+        """
+        获取匹配分辨率下指定区域的图像，channels 为匹配使用的颜色通道。
+        已生成整帧匹配图像时直接截取；否则从包含该区域的检测区域中截取。
+        """
+        if "match_image" not in self.__dict__:
+            for region in self.regions:
+                if region[0] <= start_x and region[1] <= start_y and end_x <= region[2] and end_y <= region[3]:
+                    img = self.region_image(region, channels)
+                    return img[start_y - region[1]:end_y - region[1], start_x - region[0]:end_x - region[0]]
+        return self.channel_image(channels)[start_y:end_y, start_x:end_x]
+
+    def channel_image(self, channels):
+        """
+        匹配分辨率下指定颜色通道的整帧图像
+        """
+        if channels == "bgr":
+            return self.match_image
+        if channels == "gray":
+            return self.match_gray
+        return self.cached(("match", channels), lambda: self.convert(self.match_image, channels))
+
+    @cached_property
+    def match_gray(self):
+        """
+        匹配分辨率的灰度图像
+        """
+        return cv2.cvtColor(self.match_image, cv2.COLOR_BGR2GRAY,
+                            dst=self.buffer((self.match_height, self.match_width)))
+
+    @cached_property
+    def preview(self):
+        """
+        预览窗口尺寸的BGR图像
+        """
+        shape = (self.preview_height, self.preview_width) + self.origin.shape[2:]
+        img = cv2.resize(self.origin, (self.preview_width, self.preview_height), dst=self.buffer(shape))
+        return self.to_bgr(img)
+
+    def cached(self, key, builder):
+        """
+        按键缓存派生图像，首次访问时调用 builder 生成。
+        """
+        if key not in self.cache:
+            self.cache[key] = builder()
+        return self.cache[key]
+
+    def to_preview(self, point):
+        """
+        将匹配分辨率下的坐标映射到预览图像坐标。
+
+        Args:
+            point (tuple): 匹配分辨率下的坐标(x, y)
+
+        Returns:
+            tuple: 预览图像中的坐标
+        """
+        scale_x = self.preview_width / self.match_width
+        scale_y = self.preview_height / self.match_height
+        return int(point[0] * scale_x), int(point[1] * scale_y)
@@ -0,0 +1,264 @@
+import json
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from tools.logger import LogManager
+
+
+class RollingStat:
+    """
+    有界滚动窗口: 保存最近 size 次耗时，统计吞吐率和分位数，内存占用固定。
+    """
+    QUANTILES = (50, 95, 99)
+
+    def __init__(self, size=512, rate_window=1.0):
+        self.durations = deque(maxlen=max(1, size))
+        self.timestamps = deque(maxlen=max(1, size))
+        self.rate_window = rate_window
+        self.total = 0
+        # 全部记录的累计耗时(秒)，不受窗口大小限制
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, duration):
+        """
+        记录一次耗时(秒)
+        """
+        now = time.perf_counter()
+        with self.lock:
+            self.total += 1
+            self.sum += duration
+            self.durations.append(duration)
+            self.timestamps.append(now)
+
+    def rate(self):
+        """
+        最近 rate_window 秒内的每秒次数
+        """
+        now = time.perf_counter()
+        with self.lock:
+            count = 0
+            for timestamp in reversed(self.timestamps):
+                if now - timestamp > self.rate_window:
+                    break
+                count += 1
+        return count / self.rate_window
+
+    def summary(self):
+        """
+        窗口内的统计，耗时单位为毫秒
+
+        Returns:
+            dict: count/sum/rate/mean/p50/p95/p99，count 和 sum 为全部记录的累计值
+        """
+        with self.lock:
+            durations = np.fromiter(self.durations, dtype=np.float64, count=len(self.durations))
+            total = self.total
+            total_sum = self.sum
+        result = {"count": total, "sum": round(total_sum * 1000, 4), "rate": round(self.rate(), 2)}
+        if durations.size:
+            values = durations * 1000
+            result["mean"] = round(float(values.mean()), 4)
+            for quantile, value in zip(self.QUANTILES, np.percentile(values, self.QUANTILES)):
+                result[f"p{quantile}"] = round(float(value), 4)
+        return result
+
+
+class Metrics:
+    """
+    分阶段(采集、缩放、场景更新、渲染等)及分模板的耗时统计，
+    可导出为JSON文件，或通过本地HTTP端口以Prometheus文本格式提供。
+    """
+    # 统计分组 -> Prometheus 标签名
+    GROUPS = {"stage": "stage", "template": "template"}
+
+    def __init__(self, window=512, labels=None):
+        """
+        Args:
+            window (int): 每项统计保留的样本数
+            labels (dict, optional): 导出时附加的标签，例如区分多个实例
+        """
+        self.logger = LogManager(name="metrics")
+        self.window = window
+        self.labels = dict(labels or {})
+        self.stats = {group: {} for group in self.GROUPS}
+        self.lock = threading.Lock()
+        self.server = None
+        # 性能剖析时同时接收每个时间片段，见 FrameProfiler.record
+        self.tracer = None
+        # 标签值 -> 子统计
+        self.children = {}
+
+    def stat(self, name, group="stage"):
+        """
+        获取统计项，不存在时创建
+        """
+        stats = self.stats[group]
+        stat = stats.get(name)
+        if stat is None:
+            with self.lock:
+                stat = stats.setdefault(name, RollingStat(self.window))
+        return stat
+
+    def observe(self, name, duration, group="stage"):
+        """
+        记录一次耗时(秒)
+        """
+        self.stat(name, group).observe(duration)
+        if self.tracer is not None:
+            self.tracer.record(name, group, duration)
+
+    @contextmanager
+    def timer(self, name, group="stage"):
+        """
+        统计代码块耗时
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, group)
+
+    def rate(self, name, group="stage"):
+        """
+        统计项最近的每秒次数
+        """
+        return self.stat(name, group).rate()
+
+    def child(self, name, label="instance"):
+        """
+        创建附加了标签的子统计，例如每个实例一组，导出时与本统计合并
+
+        Args:
+            name (str): 标签值
+            label (str): 标签名
+
+        Returns:
+            Metrics: 子统计
+        """
+        child = Metrics(self.window, dict(self.labels, **{label: name}))
+        child.tracer = self.tracer
+        with self.lock:
+            self.children[name] = child
+        return child
+
+    def summaries(self):
+        """
+        各分组统计项的汇总
+
+        Returns:
+            dict: {"stage": {名称: 汇总}, "template": {...}}
+        """
+        with self.lock:
+            items = {group: dict(stats) for group, stats in self.stats.items()}
+        return {group: {name: stat.summary() for name, stat in sorted(stats.items())}
+                for group, stats in items.items()}
+
+    def snapshot(self):
+        """
+        全部统计项的快照
+
+        Returns:
+            dict: {"time": 时间, "labels": 标签, "stage": {...}, "template": {...}, "instances": {...}}
+        """
+        result = {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "labels": self.labels}
+        result.update(self.summaries())
+        with self.lock:
+            children = dict(self.children)
+        if children:
+            result["instances"] = {name: child.snapshot() for name, child in children.items()}
+        return result
+
+    def export_json(self, path):
+        """
+        将快照写入JSON文件
+        """
+        output_dir = os.path.dirname(path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.snapshot(), file, indent=4, ensure_ascii=False)
+        self.logger.info("性能统计已写入 %s", path)
+
+    def prometheus(self):
+        """
+        Prometheus 文本格式的统计(含子统计)，耗时单位为秒
+        """
+        with self.lock:
+            sources = [self] + list(self.children.values())
+        summaries = [(source.labels, source.summaries()) for source in sources]
+        lines = []
+        for group, label in self.GROUPS.items():
+            metric = f"yys_{group}_latency_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for source_labels, groups in summaries:
+                for name, summary in groups[group].items():
+                    labels = dict(source_labels, **{label: name})
+                    for quantile in RollingStat.QUANTILES:
+                        if f"p{quantile}" in summary:
+                            value = summary[f"p{quantile}"] / 1000
+                            lines.append(f"{metric}{format_labels(dict(labels, quantile=quantile / 100))} {value:.9g}")
+                    lines.append(f"{metric}_sum{format_labels(labels)} {summary['sum'] / 1000:.9g}")
+                    lines.append(f"{metric}_count{format_labels(labels)} {summary['count']}")
+            rate_metric = f"yys_{group}_rate"
+            lines.append(f"# TYPE {rate_metric} gauge")
+            for source_labels, groups in summaries:
+                for name, summary in groups[group].items():
+                    lines.append(f"{rate_metric}{format_labels(dict(source_labels, **{label: name}))} {summary['rate']}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        """
+        在后台线程启动HTTP端口: /metrics 为Prometheus格式，/metrics.json 为JSON快照
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, content_type = metrics.prometheus(), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body, content_type = json.dumps(metrics.snapshot(), ensure_ascii=False), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="metrics", daemon=True).start()
+        self.logger.info("性能统计端口已启动 http://%s:%d/metrics", host, self.server.server_address[1])
+
+    def close(self):
+        """
+        关闭HTTP端口
+        """
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+def format_labels(labels):
+    """
+    格式化Prometheus标签
+    """
+    if not labels:
+        return ""
+    items = ",".join('{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                     for key, value in labels.items())
+    return "{" + items + "}"
@@ -0,0 +1,59 @@
+import threading
+from collections import deque
+
+
+class LatestFrameBuffer:
+    """
+    有界帧缓冲，满时丢弃最旧的帧，保证消费者总是拿到最新的数据。
+    """
+    def __init__(self, capacity=1):
+        self.items = deque(maxlen=max(1, capacity))
+        self.condition = threading.Condition()
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, item, block=False):
+        """
+        放入一帧，缓冲已满时最旧的帧被丢弃。
+
+        Args:
+            item: 帧数据
+            block (bool): 为True时等待消费者取走数据而不丢帧，用于回放等非实时来源
+        """
+        with self.condition:
+            while block and len(self.items) == self.items.maxlen and not self.closed:
+                self.condition.wait()
+            if len(self.items) == self.items.maxlen:
+                self.dropped += 1
+            self.items.append(item)
+            self.condition.notify_all()
+
+    def get(self, timeout=None):
+        """
+        取出一帧，超时或缓冲已关闭时返回None。
+        """
+        with self.condition:
+            if not self.items and not self.closed:
+                self.condition.wait(timeout)
+            if not self.items:
+                return None
+            item = self.items.popleft()
+            self.condition.notify_all()
+            return item
+
+    @property
+    def drained(self):
+        """
+        缓冲已关闭且剩余的帧都已取出
+        """
+        with self.condition:
+            return self.closed and not self.items
+
+    def close(self):
+        """
+        关闭缓冲并唤醒所有等待的消费者，已放入的帧仍可取出。
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
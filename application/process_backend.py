@@ -0,0 +1,200 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from application.detector import ImageDetector
+from application.frame_context import FrameContext
+from tools.buffer_pool import BufferPool
+from tools.logger import LogManager, forward_logs
+
+# 工作进程内的检测器和已映射的共享内存，由 init_worker 创建
+_worker = {}
+# 工作进程最多保留的共享内存映射数，槽位重建后旧映射按最久未用淘汰
+WORKER_SEGMENTS = 64
+
+
+class TimingRecorder:
+    """
+    工作进程中的耗时记录，接口与 Metrics 的 observe/timer 一致，
+    记录随结果返回主进程后写入对应实例的统计。
+    """
+    def __init__(self):
+        self.records = []
+
+    def observe(self, name, duration, group="stage"):
+        self.records.append((name, group, duration))
+
+    @contextmanager
+    def timer(self, name, group="stage"):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, group)
+
+
+def init_worker(detector_args, detector_kwargs, native=False, log_queue=None):
+    """
+    工作进程初始化：加载一份模板(模板包以内存映射方式读取，各进程共享页缓存)
+    """
+    # 日志交给主进程的写日志线程，避免多个进程同时写入和轮转同一个日志文件
+    if log_queue is not None:
+        forward_logs(log_queue)
+    # 并行度由进程数提供，避免每个进程的cv2再开线程造成争抢
+    cv2.setNumThreads(1)
+    pool = BufferPool()
+    _worker["pool"] = pool
+    _worker["detector"] = ImageDetector(*detector_args, max_workers=1, buffer_pool=pool, **detector_kwargs)
+    _worker["segments"] = OrderedDict()
+    _worker["native"] = native
+
+
+def attach_segment(name):
+    """
+    映射主进程创建的共享内存槽位，映射在进程内复用
+    """
+    segments = _worker["segments"]
+    segment = segments.get(name)
+    if segment is None:
+        segment = segments[name] = shared_memory.SharedMemory(name=name)
+        if len(segments) > WORKER_SEGMENTS:
+            segments.popitem(last=False)[1].close()
+    else:
+        segments.move_to_end(name)
+    return segment
+
+
+def detect_in_worker(slot_name, shape, dtype, source, targets):
+    """
+    在工作进程中匹配共享内存槽位里的一帧。
+
+    Args:
+        slot_name (str): 共享内存名称
+        shape (tuple): 帧形状
+        dtype (str): 帧数据类型
+        source (str): 帧来源(实例)标识
+        targets (tuple): 模板名称
+
+    Returns:
+        tuple: ({模板名称: 匹配结果}, [(统计名, 分组, 耗时), ...])
+    """
+    detector = _worker["detector"]
+    segment = attach_segment(slot_name)
+    # 直接在共享内存上构造图像，不复制
+    origin = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+    recorder = TimingRecorder()
+    frame = FrameContext(origin, detector.new_width, detector.new_height, _worker["pool"], recorder, source,
+                         _worker["native"])
+    detector.prepare(frame, targets)
+    results = {target: detector.detect(frame, target) for target in targets}
+    return results, recorder.records
+
+
+class ProcessDetectBackend:
+    """
+    进程池检测后端：主进程把帧复制到共享内存槽位，工作进程各自持有模板并完成匹配，
+    只返回匹配结果和耗时这样的小元组，帧数据不经过序列化。
+
+    每个帧来源(实例)固定由一个工作进程处理，按(来源, 模板)保存的区域缓存和跟踪状态
+    都在该进程的检测器中延续；因此工作进程数超过实例数时多出的进程不会被使用。
+    """
+    def __init__(self, detector_args, detector_kwargs, workers=0, slots=0, native=False):
+        """
+        Args:
+            detector_args (tuple): ImageDetector 的位置参数(模板目录、配置、预览尺寸、模板包)
+            detector_kwargs (dict): ImageDetector 的其他参数(roi_cache、tracking)
+            workers (int): 工作进程数，0 表示CPU核数；超过帧来源数的进程不会被使用
+            slots (int): 共享内存槽位数，0 表示进程数的两倍；没有空闲槽位时 submit 返回None
+            native (bool): 是否在帧的原生分辨率下匹配
+        """
+        self.workers = workers or os.cpu_count() or 1
+        initargs = (detector_args, detector_kwargs, native, LogManager.process_queue())
+        # 每个工作进程一个单进程执行器，提交时按帧来源选择
+        self.executors = [ProcessPoolExecutor(1, initializer=init_worker, initargs=initargs)
+                          for _ in range(self.workers)]
+        # 帧来源 -> 工作进程序号
+        self.assignments = {}
+        self.slots = [None] * max(1, slots or self.workers * 2)
+        self.busy = [False] * len(self.slots)
+        self.lock = threading.Lock()
+
+    def acquire_slot(self, nbytes):
+        """
+        取得空闲槽位，容量不足时重建为更大的共享内存
+
+        Returns:
+            int: 槽位序号，没有空闲槽位时返回None
+        """
+        with self.lock:
+            for index, busy in enumerate(self.busy):
+                if not busy:
+                    self.busy[index] = True
+                    break
+            else:
+                return None
+        segment = self.slots[index]
+        if segment is None or segment.size < nbytes:
+            if segment is not None:
+                segment.close()
+                segment.unlink()
+            self.slots[index] = shared_memory.SharedMemory(create=True, size=nbytes)
+        return index
+
+    def release_slot(self, index):
+        with self.lock:
+            self.busy[index] = False
+
+    def executor(self, source):
+        """
+        帧来源固定使用的工作进程，首次出现时分配给负责来源最少的进程
+        """
+        with self.lock:
+            index = self.assignments.get(source)
+            if index is None:
+                loads = [0] * len(self.executors)
+                for assigned in self.assignments.values():
+                    loads[assigned] += 1
+                index = self.assignments[source] = loads.index(min(loads))
+        return self.executors[index]
+
+    def submit(self, img, source, targets):
+        """
+        把一帧放入共享内存并提交匹配
+
+        Args:
+            img (np.ndarray): 原始图像
+            source (str): 帧来源(实例)标识
+            targets (list): 模板名称
+
+        Returns:
+            Future: 结果为 ({模板名称: 匹配结果}, 耗时记录)，没有空闲槽位时返回None
+        """
+        index = self.acquire_slot(img.nbytes)
+        if index is None:
+            return None
+        segment = self.slots[index]
+        np.copyto(np.ndarray(img.shape, dtype=img.dtype, buffer=segment.buf), img)
+        future = self.executor(source).submit(detect_in_worker, segment.name, img.shape, img.dtype.str, source,
+                                              tuple(targets))
+        # 工作进程读完后槽位才可复用
+        future.add_done_callback(lambda _, index=index: self.release_slot(index))
+        return future
+
+    def close(self):
+        """
+        关闭进程池并释放共享内存
+        """
+        for executor in self.executors:
+            executor.shutdown(wait=True, cancel_futures=True)
+        for segment in self.slots:
+            if segment is not None:
+                segment.close()
+                segment.unlink()
+        self.slots = [None] * len(self.slots)
@@ -0,0 +1,152 @@
+import os
+import io
+import json
+import time
+import pstats
+import cProfile
+import threading
+
+from tools.logger import LogManager
+
+
+class FrameProfiler:
+    """
+    运行时性能剖析: 对接下来的 N 帧执行 cProfile，并记录各阶段的时间片段，
+    输出为 Chrome trace-event 格式(可在 chrome://tracing 或 Perfetto 中查看)。
+
+    cProfile 剖析检测线程(begin_frame/end_frame 的调用线程)，以及经 run 在检测器线程池中
+    执行的匹配任务(每个工作线程一个 Profile，输出时合并)；
+    时间片段覆盖采集、缩放、每个模板的匹配、场景更新和渲染。
+    """
+    def __init__(self, output_dir="log", frames=120):
+        self.logger = LogManager(name="profiler")
+        self.output_dir = output_dir
+        self.frames = max(1, frames)
+        self.lock = threading.Lock()
+        self.pending = None
+        self.active = False
+        self.profile = None
+        # 工作线程 ident -> 该线程的 Profile
+        self.task_profiles = {}
+        self.remaining = 0
+        self.events = []
+        self.threads = {}
+        self.origin = time.perf_counter()
+
+    def request(self, frames=None):
+        """
+        请求剖析接下来的若干帧，从下一帧开始生效；正在剖析时提前结束
+        """
+        with self.lock:
+            if self.active:
+                self.remaining = 0
+                return
+            self.pending = frames or self.frames
+        self.logger.info("将剖析接下来的 %d 帧", self.pending)
+
+    def begin_frame(self):
+        """
+        检测线程在每帧开始时调用
+        """
+        if self.pending is None:
+            return
+        with self.lock:
+            self.remaining = self.pending
+            self.pending = None
+            self.events = []
+            self.task_profiles = {}
+            self.active = True
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def end_frame(self):
+        """
+        检测线程在每帧结束时调用，达到帧数后输出结果
+        """
+        if not self.active:
+            return
+        self.remaining -= 1
+        if self.remaining <= 0:
+            self.finish()
+
+    def finish(self):
+        """
+        结束剖析并输出结果，程序退出时在检测线程中调用以保存未完成的剖析
+        """
+        if not self.active:
+            return
+        self.profile.disable()
+        with self.lock:
+            self.active = False
+            # 线程名称作为元数据事件写入
+            events = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": ident, "args": {"name": name}}
+                      for ident, name in self.threads.items()] + self.events
+            self.events = []
+            task_profiles = list(self.task_profiles.values())
+            self.task_profiles = {}
+        stats = pstats.Stats(self.profile)
+        if task_profiles:
+            stats.add(*task_profiles)
+        self.write(stats, events)
+        self.profile = None
+
+    def run(self, func, *args):
+        """
+        在工作线程中执行任务，剖析期间计入该线程的 Profile
+
+        Args:
+            func (callable): 任务
+            *args: 任务参数
+
+        Returns:
+            任务的返回值
+        """
+        if not self.active:
+            return func(*args)
+        ident = threading.get_ident()
+        with self.lock:
+            profile = self.task_profiles.get(ident)
+            if profile is None:
+                profile = self.task_profiles[ident] = cProfile.Profile()
+        return profile.runcall(func, *args)
+
+    def record(self, name, group, duration):
+        """
+        记录一个刚结束的时间片段(秒)
+        """
+        if not self.active:
+            return
+        end = time.perf_counter()
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": group,
+            "ph": "X",
+            "ts": round((end - duration - self.origin) * 1e6, 1),
+            "dur": round(duration * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": thread.ident,
+        }
+        # 采集、渲染和检测器线程都会调用，与 finish 互斥
+        with self.lock:
+            self.threads[thread.ident] = thread.name
+            self.events.append(event)
+
+    def write(self, stats, events):
+        """
+        写出 cProfile 统计(.prof 及文本摘要)和 trace-event 文件
+        """
+        if not os.path.exists(self.output_dir):
+            os.makedirs(self.output_dir)
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        prof_path = os.path.join(self.output_dir, f"profile_{stamp}.prof")
+        trace_path = os.path.join(self.output_dir, f"trace_{stamp}.json")
+        stats.dump_stats(prof_path)
+        summary = io.StringIO()
+        stats.stream = summary
+        stats.sort_stats("cumulative").print_stats(40)
+        with open(os.path.join(self.output_dir, f"profile_{stamp}.txt"), 'w', encoding='utf-8') as file:
+            file.write(summary.getvalue())
+        with open(trace_path, 'w', encoding='utf-8') as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+        self.logger.info("性能剖析结果已写入 %s 和 %s", prof_path, trace_path)
@@ -1,19 +1,65 @@
-from .scenes.unknown import UnknownSceneState
-from .scenes.scene_registry import scene_state_classes
+from collections import Counter
+from concurrent.futures import wait
+
 from tools.logger import LogManager
 
+
+class LazyFounds:
+    """
+    按需匹配的检测结果。场景按优先级逐个判断 `target in founds`。
+    指定 targets 时各目标按优先级提前提交到检测器的线程池并行匹配，询问时只等待该目标的结果；
+    场景决定切换后调用 finish 取消尚未开始的匹配。
+    """
+    def __init__(self, detector, frame, targets=()):
+        self.detector = detector
+        self.frame = frame
+        self.results = {}
+        self.last_hit = None
+        self.futures = detector.submit_many(frame, list(targets))
+
+    def __contains__(self, target):
+        if target not in self.results:
+            future = self.futures.get(target)
+            self.results[target] = future.result() if future is not None else self.detector.detect(self.frame, target)
+        found = self.results[target] is not None
+        if found:
+            self.last_hit = target
+        return found
+
+    def __iter__(self):
+        return (target for target, result in self.results.items() if result is not None)
+
+    def finish(self):
+        """
+        取消尚未开始的匹配，等待已开始的匹配结束，保证下一帧开始前本帧的跟踪和缓存已更新；
+        已完成的结果也用于预览绘制
+        """
+        pending = [future for target, future in self.futures.items()
+                   if target not in self.results and not future.cancel()]
+        wait(pending)
+        for target, future in self.futures.items():
+            if target not in self.results and not future.cancelled() and future.exception() is None:
+                self.results[target] = future.result()
+
+
 class SceneContext:
-    def __init__(self):
+    def __init__(self, graph):
         self.logger = LogManager(name="scene_context")
-        self.state = UnknownSceneState(self)
-        self.last_state = UnknownSceneState(self)
+        self.graph = graph
+        # 每个场景只创建一个状态实例，切换时直接查表
+        self.states = graph.create_states(self)
+        self.state = self.states[graph.initial]
+        self.last_state = self.state
+        self.frame = None
+        # 场景类名 -> 各目标触发场景切换的次数
+        self.decisions = {}
 
     def next_state(self, new_state):
-        next_scene_class = scene_state_classes.get(new_state)
-        if not next_scene_class:
+        next_state_instance = self.states.get(new_state)
+        if not next_state_instance:
             self.logger.error(f"无法找到场景状态类：{new_state}")
             return
-        next_state_instance = next_scene_class(self)
+        next_state_instance.enter()
         self.last_state = self.state
         self.state = next_state_instance
         self.logger.info(f"场景切换：从 {self.last_state.name_cn} 到 {self.state.name_cn}")
@@ -24,5 +70,24 @@ class SceneContext:
         self.state = backup_state
         self.logger.info(f"场景切换：从 {self.last_state.name_cn} 到 {self.state.name_cn}")
         
-    def update(self, founds):
-        self.state.handle(founds)
+    def update(self, founds, frame=None):
+        # 场景逻辑可通过 self.context.frame 读取当前帧
+        self.frame = frame
+        state = self.state
+        state.handle(founds)
+        # 记录触发切换的目标，用于调整同一去向目标的判断顺序
+        deciding = getattr(founds, 'last_hit', None)
+        if self.state is not state and deciding is not None:
+            self.decisions.setdefault(type(state).__name__, Counter())[deciding] += 1
+
+    def decision_count(self, state, target):
+        """
+        目标在指定场景中触发切换的次数
+        """
+        return self.decisions.get(type(state).__name__, {}).get(target, 0)
+
+    def decision_stats(self):
+        """
+        各场景中触发切换的目标统计
+        """
+        return {scene: dict(counter) for scene, counter in self.decisions.items()}
@@ -0,0 +1,87 @@
+import json
+
+from tools.logger import LogManager
+
+
+class SceneNode:
+    """
+    编译后的单个场景: 按优先级排好的切换规则和去重后的检测目标
+    """
+    __slots__ = ("name", "transitions", "targets", "substates")
+
+    def __init__(self, name, transitions, substates):
+        self.name = name
+        # 优先级数值越小越先判断，相同优先级保持定义顺序
+        self.transitions = tuple(sorted(transitions, key=lambda info: info.get("priority", 0)))
+        self.substates = dict(substates)
+        targets = [info["target"] for info in self.transitions] + list(self.substates)
+        self.targets = tuple(dict.fromkeys(targets))
+
+
+class SceneGraph:
+    """
+    场景图: 从数据文件加载场景、触发模板、去向和优先级，启动时编译为查找表
+    """
+    def __init__(self, graph_path, scene_classes):
+        """
+        Args:
+            graph_path (str): 场景图文件路径
+            scene_classes (dict): 场景类名 -> 场景状态类
+        """
+        self.logger = LogManager(name="scene_graph")
+        self.graph_path = graph_path
+        self.scene_classes = scene_classes
+        self.initial = None
+        self.nodes = {}
+        self.load()
+
+    def load(self):
+        """
+        读取场景图并检查场景类和去向是否存在
+        """
+        with open(self.graph_path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        nodes = {}
+        for name, scene in data["scenes"].items():
+            if name not in self.scene_classes:
+                raise ValueError(f"场景图中的场景没有对应的场景状态类：{name}")
+            nodes[name] = SceneNode(name, scene.get("transitions", []), scene.get("substates", {}))
+        for node in nodes.values():
+            for info in node.transitions:
+                if info["next_scene"] not in nodes:
+                    raise ValueError(f"场景 {node.name} 的目标 {info['target']} 指向未定义的场景：{info['next_scene']}")
+        initial = data.get("initial", "UnknownSceneState")
+        if initial not in nodes:
+            raise ValueError(f"场景图的初始场景未定义：{initial}")
+        self.initial = initial
+        self.nodes = nodes
+        self.logger.info("加载场景图成功，共 %d 个场景", len(nodes))
+
+    def compile(self, detector):
+        """
+        检查各场景的触发模板是否存在。检测区域并集取决于帧的匹配分辨率，
+        由检测器在检测时按目标组合和分辨率计算并缓存。
+
+        Args:
+            detector (ImageDetector): 图像检测器
+        """
+        store = detector.template_store
+        for node in self.nodes.values():
+            missing = [target for target in node.targets if target not in store]
+            if missing:
+                self.logger.warn("场景 %s 的目标模板不存在: %s", node.name, missing)
+
+    def node(self, name):
+        """
+        获取场景节点
+        """
+        return self.nodes[name]
+
+    def create_states(self, context):
+        """
+        为每个场景创建一个状态实例，场景切换时复用。
+
+        Returns:
+            dict: 场景类名 -> 场景状态实例
+        """
+        return {name: self.scene_classes[name](context) for name in self.nodes}
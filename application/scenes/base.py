@@ -1,12 +1,53 @@
 class SceneState:
     """
-    场景状态基类
+    场景状态基类，检测目标和切换规则来自场景图(static/data/scene_graph.json)
     """
     def __init__(self, context):
         self.name_en = "BaseScene"
         self.name_cn = "场景基类"
-        self.targets = []
         self.context = context
-        
+        node = context.graph.node(type(self).__name__)
+        self.targets = node.targets
+        self.transitions = node.transitions
+
+    def enter(self):
+        """
+        切换进入该场景时调用，状态实例会被复用，需要在这里重置场景内的状态
+        """
+        pass
+
+    def schedule_key(self):
+        """
+        检测频率调度使用的键，与 conf/config.json 中 scheduler.scenes 的键对应
+        """
+        return type(self).__name__
+
     def handle(self, founds):
-        raise NotImplementedError
+        # 找到目标后，切换到相应的场景
+        for info in self.prioritized(self.transitions):
+            if info['target'] in founds:
+                self.context.next_state(info['next_scene'])
+                break
+
+    def prioritized(self, targets):
+        """
+        按历史触发次数调整判断顺序。只在去向相同的连续目标之间调整，
+        不同去向之间的优先级保持不变，因此切换结果与原顺序一致。
+
+        Args:
+            targets (list): [{"target": 模板名称, "next_scene": 场景类名}, ...]
+
+        Returns:
+            list: 调整顺序后的目标
+        """
+        ordered = []
+        start = 0
+        while start < len(targets):
+            end = start
+            while end < len(targets) and targets[end]['next_scene'] == targets[start]['next_scene']:
+                end += 1
+            group = list(targets[start:end])
+            group.sort(key=lambda info: -self.context.decision_count(self, info['target']))
+            ordered.extend(group)
+            start = end
+        return ordered
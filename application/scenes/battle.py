@@ -31,34 +31,31 @@ class BattleSceneState(SceneState):
     """
     def __init__(self, context):
         super().__init__(context)
+        # todo: 战斗场景的状态机, 包括战斗准备，战斗中，战斗结算等状态
+        # 场景图中的 substates: 模板名称 -> 战斗状态
+        self.workflow = {tag: BattleState[state] for tag, state in context.graph.node(type(self).__name__).substates.items()}
+        self.enter()
+
+    def enter(self):
         self.name_en = "Battle"
         self.name_cn = "战斗"
-        self.targets = []
-        # todo: 战斗场景的状态机, 包括战斗准备，战斗中，战斗结算等状态
         self.is_over = False
         self.battle_state = BattleState.BATTLE_READY
-        self.workflow = {"battle_ready_btn": BattleState.BATTLE_READY,
-                         "battle_preset_btn": BattleState.BATTLE_READY,
-                         "battle_auto_btn": BattleState.BATTLE_DOING,
-                         "battle_clickContinue_tag": BattleState.BATTLE_END}
+
+    def schedule_key(self):
+        # 战斗各阶段分别调度，例如自动战斗中可以降低检测频率
+        return f"{type(self).__name__}.{self.battle_state.name}"
         
     def handle(self, founds):
         if self.is_over:
             self.name_en = "Battle"
             self.name_cn = "战斗"
-            targets = [
-            ]
-            # 找到目标后，切换到相应的场景
-            for info in targets:
-                if info['target'] in founds:
-                    self.context.next_state(info['next_scene'])
-                    break
+            super().handle(founds)
         else:
             # 战斗结束返回上一场景
             if self.battle_state == BattleState.BATTLE_END:
                 self.context.prev_state()
             else:  
-                self.targets = list(self.workflow.keys())
                 for tag, state in self.workflow.items():
                     if tag in founds:
                         self.battle_state = state
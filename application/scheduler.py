@@ -0,0 +1,103 @@
+import time
+import threading
+
+import numpy as np
+
+
+class AdaptiveScheduler:
+    """
+    自适应检测频率。按场景(及子状态)配置最小/最大检测帧率，
+    场景切换或画面变化后以最大帧率检测，画面稳定时逐步退避到最小帧率。
+    """
+    # 画面签名的采样网格(列, 行)
+    SIGNATURE_GRID = (32, 18)
+
+    def __init__(self, config=None):
+        """
+        Args:
+            config (dict): scheduler 配置，包含 default/scenes/backoff/change_threshold
+        """
+        config = config or {}
+        self.default = config.get("default", {"min_fps": 5, "max_fps": 30})
+        self.scenes = config.get("scenes", {})
+        self.backoff = max(1.0, config.get("backoff", 1.5))
+        self.change_threshold = config.get("change_threshold", 8)
+        self.condition = threading.Condition()
+        self.closed = False
+        self.key = None
+        self.signature = None
+        self.interval = 0
+        self.due = 0
+        self.last_start = 0
+
+    def limits(self, key):
+        """
+        场景的检测间隔范围，依次查找完整键(如 BattleSceneState.BATTLE_DOING)、场景类名和默认配置。
+
+        Returns:
+            tuple: (最小间隔, 最大间隔) 单位秒
+        """
+        rates = self.scenes.get(key) or self.scenes.get(key.split('.')[0]) or self.default
+        max_fps = rates.get("max_fps", self.default.get("max_fps", 30))
+        min_fps = min(rates.get("min_fps", self.default.get("min_fps", 5)), max_fps)
+        return 1 / max_fps, 1 / max(min_fps, 0.01)
+
+    def frame_signature(self, img):
+        """
+        等距采样少量像素作为画面签名，用于低成本判断画面是否变化
+        """
+        step_x = max(1, img.shape[1] // self.SIGNATURE_GRID[0])
+        step_y = max(1, img.shape[0] // self.SIGNATURE_GRID[1])
+        sample = img[::step_y, ::step_x]
+        if sample.ndim == 3:
+            sample = sample[..., :3]
+        return sample.astype(np.int16)
+
+    def update(self, key, img):
+        """
+        检测完成后根据场景和画面变化计算下一次检测的时间。
+
+        Args:
+            key (str): 场景调度键
+            img (np.ndarray): 本次检测的原始图像
+        """
+        signature = self.frame_signature(img)
+        changed = (key != self.key or self.signature is None or signature.shape != self.signature.shape
+                   or np.abs(signature - self.signature).mean() > self.change_threshold)
+        min_interval, max_interval = self.limits(key)
+        if changed:
+            interval = min_interval
+        else:
+            interval = min(max(self.interval, min_interval) * self.backoff, max_interval)
+        with self.condition:
+            self.key = key
+            self.signature = signature
+            self.interval = interval
+            # 从本次采集的时间点开始计算，场景变化时通常立即到期
+            self.due = self.last_start + interval
+            self.condition.notify_all()
+
+    def wait(self):
+        """
+        等待到下一次检测的时间点，关闭后立即返回
+        """
+        with self.condition:
+            while not self.closed:
+                remaining = self.due - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            # 检测结果返回前按当前间隔占用下一时间点，避免重复采集
+            self.last_start = time.perf_counter()
+            self.due = self.last_start + self.interval
+
+    def rate(self):
+        """
+        当前的目标检测帧率
+        """
+        return 1 / self.interval if self.interval else 0
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
@@ -0,0 +1,103 @@
+import json
+import struct
+
+import numpy as np
+
+# 文件结构: 魔数 | 索引长度(uint32) | 保留(uint32) | JSON索引 | 对齐的原始uint8像素数据
+BUNDLE_MAGIC = b"YYSTPL\x00\x01"
+BUNDLE_VERSION = 1
+BUNDLE_ALIGN = 64
+HEADER_FORMAT = "<8sII"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+
+def _align(offset, alignment=BUNDLE_ALIGN):
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def write_bundle(templates, bundle_path, sources=None):
+    """
+    将已解码的模板写入编译后的二进制模板包。
+
+    Args:
+        templates (list[Template]): 已解码的模板
+        bundle_path (str): 输出文件路径
+        sources (dict, optional): 模板文件名 -> [修改时间(ns), 文件大小]，用于判断模板包是否过期
+
+    Returns:
+        int: 写入的模板数量
+    """
+    entries = []
+    relative_offset = 0
+    for template in templates:
+        image = np.ascontiguousarray(template.image, dtype=np.uint8)
+        relative_offset = _align(relative_offset)
+        entries.append({
+            "name": template.name,
+            "file": template.file,
+            "description": template.description,
+            "lt_x": template.lt_x,
+            "lt_y": template.lt_y,
+            "width": template.width,
+            "height": template.height,
+            "is_all_scan": template.is_all_scan,
+            **template.options(),
+            "offset": relative_offset,
+            "shape": list(image.shape),
+            "dtype": "uint8",
+        })
+        relative_offset += image.nbytes
+
+    index = json.dumps({"version": BUNDLE_VERSION, "sources": sources or {}, "templates": entries},
+                       ensure_ascii=False).encode('utf-8')
+    data_start = _align(HEADER_SIZE + len(index))
+
+    with open(bundle_path, 'wb') as file:
+        file.write(struct.pack(HEADER_FORMAT, BUNDLE_MAGIC, len(index), 0))
+        file.write(index)
+        for template, entry in zip(templates, entries):
+            file.write(b"\x00" * (data_start + entry["offset"] - file.tell()))
+            file.write(np.ascontiguousarray(template.image, dtype=np.uint8).tobytes())
+    return len(entries)
+
+
+def read_index(bundle_path):
+    """
+    只读取模板包的索引，不映射像素数据。
+
+    Args:
+        bundle_path (str): 模板包路径
+
+    Returns:
+        tuple: (索引, 索引长度)
+    """
+    with open(bundle_path, 'rb') as file:
+        magic, index_size, _ = struct.unpack(HEADER_FORMAT, file.read(HEADER_SIZE))
+        if magic != BUNDLE_MAGIC:
+            raise ValueError(f"无效的模板包文件: {bundle_path}")
+        index = json.loads(file.read(index_size).decode('utf-8'))
+    if index.get("version") != BUNDLE_VERSION:
+        raise ValueError(f"不支持的模板包版本: {index.get('version')}")
+    return index, index_size
+
+
+def load_bundle(bundle_path):
+    """
+    以内存映射方式加载模板包，模板像素直接引用映射区域，无需解码。
+
+    Args:
+        bundle_path (str): 模板包路径
+
+    Returns:
+        list[dict]: 模板元数据，像素数组位于 image 字段
+    """
+    index, index_size = read_index(bundle_path)
+    data_start = _align(HEADER_SIZE + index_size)
+    buffer = np.memmap(bundle_path, dtype=np.uint8, mode='r')
+    entries = []
+    for entry in index["templates"]:
+        start = data_start + entry["offset"]
+        size = int(np.prod(entry["shape"]))
+        entry["image"] = buffer[start:start + size].reshape(entry["shape"])
+        entries.append(entry)
+    return entries
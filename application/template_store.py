@@ -0,0 +1,310 @@
+import os
+import json
+import base64
+import threading
+
+import cv2
+import numpy as np
+
+from tools.logger import LogManager
+from application.template_bundle import load_bundle, read_index, write_bundle
+from application.frame_context import CHANNELS, convert_channels
+
+
+# 模板JSON中可选的匹配参数及其默认值
+TEMPLATE_OPTIONS = {
+    # 金字塔匹配的缩放比例，0 表示不使用金字塔匹配
+    "pyramid_scale": 0,
+    # 金字塔匹配在原分辨率下验证的候选数量
+    "pyramid_candidates": 3,
+    # 匹配方法，见 MATCH_MODES
+    "mode": "ccoeff_normed",
+    # 匹配使用的颜色通道，见 CHANNELS；单通道的匹配耗时约为BGR的三分之一
+    "channels": "bgr",
+    # 匹配阈值与搜索区域的额外宽高，为None时使用检测器的默认值
+    "threshold": None,
+    "padding": None,
+}
+
+# 匹配方法名称 -> cv2 匹配方法
+MATCH_MODES = {
+    "ccoeff_normed": cv2.TM_CCOEFF_NORMED,
+    "ccorr_normed": cv2.TM_CCORR_NORMED,
+    "sqdiff_normed": cv2.TM_SQDIFF_NORMED,
+}
+
+
+class Template:
+    """
+    已解码的模板数据
+    """
+    __slots__ = ("name", "file", "description", "image", "lt_x", "lt_y", "width", "height", "is_all_scan",
+                 "pyramid_scale", "pyramid_candidates", "pyramid_image", "mode", "channels", "threshold",
+                 "padding", "method", "match_image")
+
+    def __init__(self, name, image, lt_x, lt_y, width, height, is_all_scan, file=None, description="",
+                 pyramid_scale=0, pyramid_candidates=3, mode="ccoeff_normed", channels="bgr", threshold=None,
+                 padding=None):
+        self.name = name
+        self.file = file
+        self.description = description
+        self.image = image
+        self.lt_x = lt_x
+        self.lt_y = lt_y
+        self.width = width
+        self.height = height
+        self.is_all_scan = is_all_scan
+        self.pyramid_scale = pyramid_scale
+        self.pyramid_candidates = pyramid_candidates
+        self.mode = mode
+        self.channels = channels
+        self.threshold = threshold
+        self.padding = padding
+        self.pyramid_image = None
+        self.prepare()
+
+    def prepare(self):
+        """
+        预先计算匹配时使用的派生图像：按 channels 转换后的模板及其金字塔缩小图。
+        """
+        if self.mode not in MATCH_MODES:
+            raise ValueError(f"模板[{self.name}]的匹配方法无效: {self.mode}")
+        if self.channels not in CHANNELS:
+            raise ValueError(f"模板[{self.name}]的颜色通道无效: {self.channels}")
+        self.method = MATCH_MODES[self.mode]
+        self.match_image = convert_channels(self.image, self.channels)
+        self.pyramid_image = None
+        if 0 < self.pyramid_scale < 1:
+            self.pyramid_image = cv2.resize(self.match_image, None, fx=self.pyramid_scale, fy=self.pyramid_scale,
+                                            interpolation=cv2.INTER_AREA)
+
+    def options(self):
+        """
+        可选匹配参数的当前值
+        """
+        return {key: getattr(self, key) for key in TEMPLATE_OPTIONS}
+
+    def scaled(self, scale_x, scale_y, padding):
+        """
+        按比例缩放坐标、尺寸和图像的模板，用于在原生分辨率的帧上直接匹配。
+
+        Args:
+            scale_x (float): 横向缩放比例
+            scale_y (float): 纵向缩放比例
+            padding (int): 基准分辨率下搜索区域的额外宽高
+
+        Returns:
+            Template: 缩放后的模板
+        """
+        width = max(1, int(round(self.width * scale_x)))
+        height = max(1, int(round(self.height * scale_y)))
+        interpolation = cv2.INTER_AREA if scale_x * scale_y < 1 else cv2.INTER_LINEAR
+        image = cv2.resize(self.image, (width, height), interpolation=interpolation)
+        return self.copy(image=image,
+                         lt_x=int(round(self.lt_x * scale_x)),
+                         lt_y=int(round(self.lt_y * scale_y)),
+                         width=width,
+                         height=height,
+                         padding=int(round(padding * max(scale_x, scale_y))))
+
+    def copy(self, **changes):
+        """
+        复制模板并修改部分参数，例如基准测试中对比不同匹配方式。
+        """
+        values = {key: getattr(self, key) for key in ("name", "image", "lt_x", "lt_y", "width", "height",
+                                                      "is_all_scan", "file", "description")}
+        values.update(self.options())
+        values.update(changes)
+        return Template(**values)
+
+
+class TemplateStore:
+    """
+    模板仓库，启动时一次性读取并解码全部模板，按名称索引。
+    """
+    def __init__(self, template_dir, config_path, bundle_path=None):
+        self.logger = LogManager(name="template_store")
+        self.template_dir = template_dir
+        self.config_path = config_path
+        self.bundle_path = bundle_path
+        self.templates = {}
+        self.lock = threading.Lock()
+        self.load()
+
+    def load_config(self):
+        """
+        加载模板清单。
+        """
+        with open(self.config_path, 'r', encoding='utf-8') as file:
+            config = json.load(file)
+        return config['templates']
+
+    def decode_file(self, entry):
+        """
+        读取并解码单个模板JSON文件。
+
+        Args:
+            entry (dict): 模板清单中的条目
+
+        Returns:
+            Template: 解码后的模板
+        """
+        target_path = os.path.join(self.template_dir, entry['file'])
+        with open(target_path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        target_array = np.frombuffer(base64.b64decode(data['data']), dtype=np.uint8)
+        image = cv2.imdecode(target_array, cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError(f"模板图像解码失败: {target_path}")
+        return Template(name=entry['name'],
+                        image=image,
+                        lt_x=data['lt_x'],
+                        lt_y=data['lt_y'],
+                        width=data['width'],
+                        height=data['height'],
+                        is_all_scan=data['is_all_scan'],
+                        file=entry['file'],
+                        description=entry.get('description', ""),
+                        **{key: data.get(key, default) for key, default in TEMPLATE_OPTIONS.items()})
+
+    def source_stats(self, entries=None):
+        """
+        模板清单中各模板文件的修改时间和大小，编译模板包时记录，加载时比对。
+
+        Returns:
+            dict: 模板文件名 -> [修改时间(ns), 文件大小]，文件不存在时为None
+        """
+        stats = {}
+        for entry in entries if entries is not None else self.load_config():
+            path = os.path.join(self.template_dir, entry['file'])
+            if os.path.exists(path):
+                stat = os.stat(path)
+                stats[entry['file']] = [stat.st_mtime_ns, stat.st_size]
+            else:
+                stats[entry['file']] = None
+        return stats
+
+    def bundle_usable(self):
+        """
+        模板包存在、不早于模板清单，且清单中每个模板文件都与编译时一致时才使用模板包。
+        """
+        if not self.bundle_path or not os.path.exists(self.bundle_path):
+            return False
+        if os.path.getmtime(self.bundle_path) < os.path.getmtime(self.config_path):
+            self.logger.warn("模板包 %s 早于模板清单，改为读取JSON模板", self.bundle_path)
+            return False
+        try:
+            sources = read_index(self.bundle_path)[0].get("sources", {})
+        except Exception as e:
+            self.logger.error("读取模板包索引失败，改为读取JSON模板: %s", e)
+            return False
+        changed = [file for file, stat in self.source_stats().items() if sources.get(file) != stat]
+        if changed:
+            self.logger.warn("模板包 %s 编译后模板文件有变化(%s)，改为读取JSON模板", self.bundle_path,
+                             ", ".join(changed[:5]))
+            return False
+        return True
+
+    def load_from_bundle(self):
+        """
+        从编译后的模板包加载全部模板。
+        """
+        templates = {}
+        for entry in load_bundle(self.bundle_path):
+            templates[entry['name']] = Template(name=entry['name'],
+                                                image=entry['image'],
+                                                lt_x=entry['lt_x'],
+                                                lt_y=entry['lt_y'],
+                                                width=entry['width'],
+                                                height=entry['height'],
+                                                is_all_scan=entry['is_all_scan'],
+                                                file=entry.get('file'),
+                                                description=entry.get('description', ""),
+                                                **{key: entry.get(key, default) for key, default in TEMPLATE_OPTIONS.items()})
+        return templates
+
+    def load_from_json(self):
+        """
+        从模板清单逐个读取并解码JSON模板。
+        """
+        templates = {}
+        for entry in self.load_config():
+            try:
+                templates[entry['name']] = self.decode_file(entry)
+            except Exception as e:
+                self.logger.error("加载模板[%s]失败: %s", entry.get('name'), e)
+        return templates
+
+    def load(self):
+        """
+        加载全部模板，已有缓存会被整体替换。
+        """
+        templates = None
+        if self.bundle_usable():
+            try:
+                templates = self.load_from_bundle()
+                self.logger.info("已从模板包 %s 加载模板 %d 个", self.bundle_path, len(templates))
+            except Exception as e:
+                self.logger.error("加载模板包失败，改为读取JSON模板: %s", e)
+        if templates is None:
+            templates = self.load_from_json()
+            self.logger.info("已加载模板 %d 个", len(templates))
+        with self.lock:
+            self.templates = templates
+
+    def compile_bundle(self, bundle_path=None):
+        """
+        将模板清单中的JSON模板编译为二进制模板包。
+
+        Args:
+            bundle_path (str, optional): 输出路径，默认使用 bundle_path
+
+        Returns:
+            int: 写入的模板数量
+        """
+        bundle_path = bundle_path or self.bundle_path
+        # 先记录文件状态再读取，读取期间被修改的文件在下次加载时会被判定为过期
+        sources = self.source_stats()
+        templates = list(self.load_from_json().values())
+        count = write_bundle(templates, bundle_path, sources)
+        self.logger.info("模板包已写入 %s，共 %d 个模板", bundle_path, count)
+        return count
+
+    def invalidate(self, name=None):
+        """
+        使模板缓存失效并重新加载。单个模板总是从JSON文件重新读取，不使用模板包。
+
+        Args:
+            name (str, optional): 模板名称，为空时重新加载全部模板
+        """
+        if name is None:
+            self.load()
+            return
+        entry = next((item for item in self.load_config() if item['name'] == name), None)
+        with self.lock:
+            self.templates.pop(name, None)
+        if entry is None:
+            self.logger.error(f"模板清单中未找到[{name}]")
+            return
+        template = self.decode_file(entry)
+        with self.lock:
+            self.templates[name] = template
+        self.logger.debug(f"模板[{name}]已重新加载")
+
+    def get(self, name):
+        """
+        根据模板名称获取模板，不存在时返回None。
+        """
+        return self.templates.get(name)
+
+    def names(self):
+        """
+        获取全部模板名称。
+        """
+        return list(self.templates.keys())
+
+    def __contains__(self, name):
+        return name in self.templates
+
+    def __len__(self):
+        return len(self.templates)
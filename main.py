@@ -1,16 +1,27 @@
+import os
 import argparse
 from application.app import Application
 from tools.admin import useAdminRun
 
-def main(config_path):
-    app = Application(config_path)
+def main(config_path, source=None, fps=0, loop=True, headless=None, profile_frames=None):
+    source_config = None
+    if source:
+        # 回放目录中的截图或视频文件，用于无窗口环境下测量吞吐
+        source_type = "images" if os.path.isdir(source) else "video"
+        source_config = {"type": source_type, "path": source, "fps": fps, "loop": loop}
+    app = Application(config_path, source_config, headless, profile_frames)
     app.run()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="启动应用程序并指定配置文件")
     parser.add_argument('-c', '--config', type=str, default='conf/config.json', help='配置文件的路径')
+    parser.add_argument('-s', '--source', type=str, default=None, help='回放的截图目录或视频文件，不指定时截取游戏窗口')
+    parser.add_argument('--fps', type=float, default=0, help='回放帧率，0 表示尽可能快')
+    parser.add_argument('--once', action='store_true', help='回放一遍后退出，不循环')
+    parser.add_argument('--headless', action='store_true', default=None, help='无界面运行，不显示预览窗口，默认使用配置文件中的 headless')
+    parser.add_argument('--profile', type=int, default=None, metavar='N', help='启动后剖析前 N 帧，结果写入 log/')
     args = parser.parse_args()
     
     # useAdminRun()  # 如果需要管理员权限，取消注释这一行
     
-    main(args.config)
\ No newline at end of file
+    main(args.config, args.source, args.fps, not args.once, args.headless, args.profile)
\ No newline at end of file
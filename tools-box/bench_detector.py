@@ -0,0 +1,262 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+
+import cv2
+import numpy as np
+
+# 以项目根目录为工作目录运行，保证 application/tools 可被导入
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.chdir(ROOT_DIR)
+
+from application.detector import ImageDetector
+from application.frame_context import FrameContext
+from application.scene_graph import SceneGraph
+from application.scenes.scene_registry import scene_state_classes
+
+
+def summarize(samples):
+    """
+    统计耗时样本(秒)，返回毫秒单位的 mean/p50/p99。
+    """
+    values = np.asarray(samples) * 1000
+    return {
+        "mean": round(float(values.mean()), 4),
+        "p50": round(float(np.percentile(values, 50)), 4),
+        "p99": round(float(np.percentile(values, 99)), 4),
+    }
+
+
+def load_captures(cap_dir):
+    """
+    读取截图目录中的全部截图。
+    """
+    captures = {}
+    for name in sorted(os.listdir(cap_dir)):
+        if not name.lower().endswith('.png'):
+            continue
+        img = cv2.imread(os.path.join(cap_dir, name), cv2.IMREAD_COLOR)
+        if img is not None:
+            captures[os.path.splitext(name)[0]] = img
+    return captures
+
+
+def scene_targets(graph_path):
+    """
+    从场景图获取各场景需要匹配的模板。
+    """
+    graph = SceneGraph(graph_path, scene_state_classes)
+    return {name: list(node.targets) for name, node in graph.nodes.items()}
+
+
+def bench_match(detector, frame, template, iterations, warmup):
+    """
+    测量模板在单张截图上的匹配耗时及匹配结果。
+    """
+    for _ in range(warmup):
+        detector.match(frame, template)
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        detector.match(frame, template)
+        samples.append(time.perf_counter() - start)
+
+    located = detector.locate(frame, template)
+    stats = summarize(samples)
+    stats.update({
+        "score": round(float(located[0]), 4) if located else None,
+        "found": bool(located and located[0] >= detector.threshold(template)),
+        "position": list(located[1]) if located else None,
+    })
+    return stats
+
+
+def bench_template(detector, frame, template, iterations, warmup, channels=()):
+    """
+    测量单个模板在单张截图上的匹配耗时，启用金字塔匹配的模板同时对比原分辨率匹配，
+    并对比 channels 中其他颜色通道的耗时和结果。
+    """
+    stats = bench_match(detector, frame, template, iterations, warmup)
+    img = frame.match_image
+    start_x, start_y, end_x, end_y = detector.search_region(template, img.shape[1], img.shape[0])
+    stats.update({
+        "roi": [end_x - start_x, end_y - start_y],
+        "roi_pixels": (end_x - start_x) * (end_y - start_y),
+    })
+    if template.pyramid_scale:
+        full = bench_match(detector, frame, template.copy(pyramid_scale=0), iterations, warmup)
+        stats["pyramid"] = {
+            "full_mean": full["mean"],
+            "full_score": full["score"],
+            "speedup": round(full["mean"] / stats["mean"], 2) if stats["mean"] else None,
+            # 命中判断一致，且命中时位置一致
+            "parity": full["found"] == stats["found"] and (not full["found"] or full["position"] == stats["position"]),
+        }
+    variants = {}
+    for name in channels:
+        if name == template.channels:
+            continue
+        variant = bench_match(detector, frame, template.copy(channels=name), iterations, warmup)
+        variants[name] = {
+            "mean": variant["mean"],
+            "score": variant["score"],
+            "speedup": round(stats["mean"] / variant["mean"], 2) if variant["mean"] else None,
+            "parity": variant["found"] == stats["found"] and (not stats["found"] or variant["position"] == stats["position"]),
+        }
+    if variants:
+        stats["channels"] = variants
+    return stats
+
+
+def bench_prepare(img, preview_width, preview_height, iterations, native=False):
+    """
+    测量每帧生成匹配图像的耗时，native 为False时包含缩放到基准分辨率。
+    """
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        FrameContext(img, preview_width, preview_height, native=native).match_image
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def compare(result, baseline_path, tolerance):
+    """
+    与历史结果对比，返回变慢超过容差的模板。
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as file:
+        baseline = json.load(file)
+    regressions = []
+    for cap_name, cap in result["captures"].items():
+        old_cap = baseline.get("captures", {}).get(cap_name)
+        if not old_cap:
+            continue
+        for name, stats in cap["templates"].items():
+            old = old_cap["templates"].get(name)
+            if old and stats["mean"] > old["mean"] * (1 + tolerance):
+                regressions.append((cap_name, name, old["mean"], stats["mean"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模板匹配性能基准测试")
+    parser.add_argument('-c', '--config', type=str, default='conf/config.json', help='配置文件的路径')
+    parser.add_argument('--captures', type=str, default='static/images/cap', help='截图目录')
+    parser.add_argument('-n', '--iterations', type=int, default=50, help='每个模板的测量次数')
+    parser.add_argument('--warmup', type=int, default=5, help='预热次数')
+    parser.add_argument('-o', '--output', type=str, default='log/bench_detector.json', help='结果输出路径(JSON)')
+    parser.add_argument('--baseline', type=str, default=None, help='对比的历史结果，变慢超过容差时返回非零')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='允许的平均耗时增长比例')
+    parser.add_argument('--channels', type=str, default='bgr,gray',
+                        help='与模板配置对比的颜色通道，逗号分隔，为空时不对比')
+    parser.add_argument('--scale', type=float, default=1.0, help='截图缩放比例，模拟不同的窗口分辨率')
+    parser.add_argument('--native', action='store_true',
+                        help='截图不大于基准分辨率时在原生分辨率下匹配(模板按分辨率缩放)')
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as file:
+        config = json.load(file)
+    preview_width, preview_height = config["new_width"], config["new_height"]
+    # 单线程测量，结果反映单个模板的真实匹配耗时
+    detector = ImageDetector(config["template_dir"], config["template_config"], preview_width, preview_height,
+                             config.get("template_bundle"), max_workers=1)
+    captures = load_captures(args.captures)
+    if args.scale != 1:
+        captures = {name: cv2.resize(img, None, fx=args.scale, fy=args.scale, interpolation=cv2.INTER_LINEAR)
+                    for name, img in captures.items()}
+    names = detector.template_store.names()
+    channels = [name for name in args.channels.split(',') if name]
+
+    result = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "scale": args.scale,
+            "native": args.native,
+            "templates": len(names),
+        },
+        "captures": {},
+        "scenes": {},
+    }
+
+    for cap_name, img in captures.items():
+        frame = FrameContext(img, preview_width, preview_height, native=args.native)
+        cap_result = {
+            "size": [img.shape[1], img.shape[0]],
+            "prepare": bench_prepare(img, preview_width, preview_height, args.iterations, args.native),
+            "templates": {},
+        }
+        if args.native:
+            # 对比逐帧缩放到基准分辨率的耗时
+            cap_result["prepare_resized"] = bench_prepare(img, preview_width, preview_height, args.iterations)
+        for name in names:
+            cap_result["templates"][name] = bench_template(detector, frame, detector.template(frame, name),
+                                                           args.iterations, args.warmup, channels)
+        result["captures"][cap_name] = cap_result
+
+    # 场景单帧耗时 = 生成基准图像 + 该场景全部目标的平均匹配耗时
+    for scene_name, targets in scene_targets(config.get("scene_graph", "static/data/scene_graph.json")).items():
+        frame_cost = {}
+        for cap_name, cap_result in result["captures"].items():
+            cost = cap_result["prepare"]["mean"]
+            cost += sum(cap_result["templates"][t]["mean"] for t in targets if t in cap_result["templates"])
+            frame_cost[cap_name] = round(cost, 4)
+        result["scenes"][scene_name] = {"targets": targets, "frame_cost_ms": frame_cost}
+    detector.close()
+
+    output_dir = os.path.dirname(args.output)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(result, file, indent=4, ensure_ascii=False)
+
+    print(f"{'template':<28}{'mean(ms)':>10}{'p99(ms)':>10}{'roi':>12}")
+    for name in names:
+        means = [cap["templates"][name]["mean"] for cap in result["captures"].values()]
+        p99s = [cap["templates"][name]["p99"] for cap in result["captures"].values()]
+        roi = next(iter(result["captures"].values()))["templates"][name]["roi"] if captures else [0, 0]
+        print(f"{name:<28}{np.mean(means):>10.3f}{max(p99s):>10.3f}{f'{roi[0]}x{roi[1]}':>12}")
+    for cap_name, cap in result["captures"].items():
+        for name, stats in cap["templates"].items():
+            if "pyramid" in stats:
+                pyramid = stats["pyramid"]
+                print(f"金字塔 {cap_name}/{name}: {pyramid['full_mean']:.3f} -> {stats['mean']:.3f} ms, "
+                      f"得分 {pyramid['full_score']} -> {stats['score']}, 一致: {pyramid['parity']}")
+    # 各颜色通道相对模板当前配置的加速比及命中是否一致，汇总全部截图
+    for name in names:
+        template = detector.template_store.get(name)
+        for channel in channels:
+            variants = [cap["templates"][name]["channels"][channel] for cap in result["captures"].values()
+                        if channel in cap["templates"][name].get("channels", {})]
+            if not variants:
+                continue
+            speedup = np.mean([variant["speedup"] for variant in variants if variant["speedup"]])
+            parity = sum(variant["parity"] for variant in variants)
+            print(f"通道 {name}: {template.channels} -> {channel} 加速 {speedup:.2f}x, "
+                  f"结果一致 {parity}/{len(variants)}")
+    for cap_name, cap in result["captures"].items():
+        if "prepare_resized" in cap:
+            print(f"帧准备 {cap_name}: 缩放 {cap['prepare_resized']['mean']:.3f} -> 原生 {cap['prepare']['mean']:.3f} ms")
+    for scene_name, scene in result["scenes"].items():
+        costs = list(scene["frame_cost_ms"].values())
+        print(f"场景 {scene_name:<22} 单帧平均 {np.mean(costs):.3f} ms")
+    print(f"结果已写入 {args.output}")
+
+    if args.baseline:
+        regressions = compare(result, args.baseline, args.tolerance)
+        for cap_name, name, old, new in regressions:
+            print(f"变慢: {cap_name}/{name} {old:.3f} -> {new:.3f} ms")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import os
+import sys
+import json
+import argparse
+
+# 以项目根目录为工作目录运行，保证 application/tools 可被导入
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.chdir(ROOT_DIR)
+
+from application.template_store import TemplateStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="将JSON模板编译为二进制模板包")
+    parser.add_argument('-c', '--config', type=str, default='conf/config.json', help='配置文件的路径')
+    parser.add_argument('-o', '--output', type=str, default=None, help='模板包输出路径，默认使用配置中的 template_bundle')
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as file:
+        config = json.load(file)
+    bundle_path = args.output or config.get("template_bundle", "static/data/template.bundle")
+
+    store = TemplateStore(config["template_dir"], config["template_config"])
+    count = store.compile_bundle(bundle_path)
+    print(f"已编译 {count} 个模板到 {bundle_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -40,7 +40,7 @@ def save_config(config):
         json.dump(config, file, indent=4)
         
         
-def save_img_to_json(x, y, img_path, out_dir, is_all_scan):
+def save_img_to_json(x, y, img_path, out_dir, is_all_scan, options=None):
     if not os.path.exists(img_path):
         raise FileNotFoundError("指定的文件不存在: " + img_path)
     icon = imread(img_path, IMREAD_UNCHANGED)
@@ -61,6 +61,10 @@ def save_img_to_json(x, y, img_path, out_dir, is_all_scan):
         'is_all_scan': is_all_scan,
         'data': icon_base64
     }
+    # 可选的匹配参数(mode/channels/threshold/padding)，未设置的使用检测器默认值
+    for key, value in (options or {}).items():
+        if value is not None:
+            data[key] = value
 
     with open(out_path, 'w', encoding='utf-8') as file:
         json.dump(data, file, indent=4)
@@ -117,12 +121,20 @@ def main(page: ft.Page):
     out_dir_input = ft.TextField(label="输出路径", value=config['out_dir_input'], width=input_width)
     template_json_path_input = ft.TextField(label="Template JSON 路径", value=config['template_json_path_input'], width=input_width)
     desc_input = ft.TextField(label="模板描述", value="", width=input_width)
+    mode_input = ft.Dropdown(label="匹配方法", value=config.get('mode', "ccoeff_normed"), width=input_num_width,
+                             options=[ft.dropdown.Option(mode) for mode in ("ccoeff_normed", "ccorr_normed", "sqdiff_normed")])
+    channels_input = ft.Dropdown(label="颜色通道", value=config.get('channels', "bgr"), width=input_num_width,
+                                 options=[ft.dropdown.Option(channels) for channels in ("bgr", "gray", "b", "g", "r")])
+    threshold_input = ft.TextField(label="匹配阈值(留空使用默认值)", value="", width=input_num_width)
+    padding_input = ft.TextField(label="搜索区域额外宽高(留空使用默认值)", value="", width=input_num_width)
     full_scan_checkbox = ft.Checkbox(label="全区域扫描", value=config['is_full_scan'])
     inverse_checkbox = ft.Checkbox(label="反向解析坐标", value=config['is_inverse'])
     is_dark = ft.Checkbox(label="启用深色模式", value=config['is_dark'])
     message_text = ft.Text("", color="green")
 
     coordinate_row = ft.Row(controls=[x_input, y_input])
+    match_row = ft.Row(controls=[mode_input, channels_input])
+    limit_row = ft.Row(controls=[threshold_input, padding_input])
     checkbox_row = ft.Row(controls=[full_scan_checkbox, inverse_checkbox, is_dark])
     
     # 窗口大小调整时更新配置
@@ -146,6 +158,8 @@ def main(page: ft.Page):
         config['is_full_scan'] = full_scan_checkbox.value
         config['is_inverse'] = inverse_checkbox.value
         config['is_dark'] = is_dark.value
+        config['mode'] = mode_input.value
+        config['channels'] = channels_input.value
         save_config(config)
         page.update()  # 刷新页面以应用更改
         
@@ -166,7 +180,14 @@ def main(page: ft.Page):
                 target_x = x
                 target_y = y
                 
-            name = save_img_to_json(target_x, target_y, img_path, out_dir, full_scan_checkbox.value)
+            # 与默认值相同的参数不写入模板
+            options = {
+                'mode': mode_input.value if mode_input.value != "ccoeff_normed" else None,
+                'channels': channels_input.value if channels_input.value != "bgr" else None,
+                'threshold': float(threshold_input.value) if threshold_input.value else None,
+                'padding': int(padding_input.value) if padding_input.value else None,
+            }
+            name = save_img_to_json(target_x, target_y, img_path, out_dir, full_scan_checkbox.value, options)
             update_template_json(template_json_path, name, f"{name}.json", description)
             message_text.value = f"转换成功: {name}.json"
             message_text.color = "green"
@@ -189,8 +210,11 @@ def main(page: ft.Page):
     full_scan_checkbox.on_change = on_data_change
     inverse_checkbox.on_change = on_data_change
     is_dark.on_change = on_data_change
+    mode_input.on_change = on_data_change
+    channels_input.on_change = on_data_change
     
-    page.add(coordinate_row, img_input, out_dir_input, desc_input, template_json_path_input, checkbox_row, convert_button, message_text)
+    page.add(coordinate_row, img_input, out_dir_input, desc_input, template_json_path_input, match_row, limit_row,
+             checkbox_row, convert_button, message_text)
 
     # 添加文件选择器
     def on_file_pick(e):
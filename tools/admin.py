@@ -1,12 +1,19 @@
 import sys
 import os
-from ctypes import windll
 import logging
 
+try:
+    from ctypes import windll
+except ImportError:
+    # 非Windows平台无需提权
+    windll = None
+
 def useAdminRun():
     """
     用管理员运行程序
     """
+    if windll is None:
+        return
     if not windll.shell32.IsUserAnAdmin():
         logging.error("非管理员启动，尝试提权")
         
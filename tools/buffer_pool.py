@@ -0,0 +1,83 @@
+import weakref
+import threading
+
+import numpy as np
+
+
+class BufferPool:
+    """
+    按形状和类型复用的图像缓冲池，供采集和cv2调用的 dst 输出使用。
+
+    每块缓冲的内存在仍被引用时归调用方所有：取得的数组及其切片都持有这块内存，
+    最后一个引用释放后内存才回到池中，之后的 acquire 才会复用，因此流水线中
+    仍在使用的帧不会被覆盖。每种形状最多保留 depth 块空闲内存，超出的直接释放。
+    """
+    def __init__(self, depth=8):
+        self.depth = max(1, depth)
+        # (形状, 类型) -> 空闲内存块列表
+        self.free = {}
+        # 缓冲释放时的回调可能在任意线程、甚至持有锁的线程中触发
+        self.lock = threading.RLock()
+        self.allocations = 0
+        self.reuses = 0
+        self.in_use = 0
+
+    def acquire(self, shape, dtype=np.uint8):
+        """
+        获取指定形状和类型的缓冲，内容未初始化。
+
+        Args:
+            shape (tuple): 数组形状
+            dtype: 数据类型
+
+        Returns:
+            np.ndarray: 缓冲数组，不再被引用时自动归还
+        """
+        shape = tuple(shape)
+        dtype = np.dtype(dtype)
+        key = (shape, dtype.str)
+        with self.lock:
+            blocks = self.free.get(key)
+            block = blocks.pop() if blocks else None
+            if block is None:
+                self.allocations += 1
+            else:
+                self.reuses += 1
+            self.in_use += 1
+        if block is None:
+            block = bytearray(int(np.prod(shape, dtype=np.int64)) * dtype.itemsize)
+        # 数组直接引用内存块，其切片的 base 都是该数组，数组被回收即表示没有任何引用
+        buffer = np.ndarray(shape, dtype=dtype, buffer=block)
+        finalizer = weakref.finalize(buffer, self.release, key, block)
+        finalizer.atexit = False
+        return buffer
+
+    def release(self, key, block):
+        """
+        缓冲不再被引用时归还内存块
+        """
+        with self.lock:
+            self.in_use -= 1
+            blocks = self.free.setdefault(key, [])
+            if len(blocks) < self.depth:
+                blocks.append(block)
+
+    def clear(self):
+        """
+        释放全部空闲缓冲，例如窗口尺寸变化之后。
+        """
+        with self.lock:
+            self.free.clear()
+
+    def stats(self):
+        """
+        缓冲池统计信息
+        """
+        with self.lock:
+            return {
+                "shapes": len(self.free),
+                "buffers": sum(len(blocks) for blocks in self.free.values()),
+                "in_use": self.in_use,
+                "allocations": self.allocations,
+                "reuses": self.reuses,
+            }
@@ -0,0 +1,165 @@
+import os
+import time
+
+import cv2
+
+from tools.logger import LogManager
+
+
+class FrameSource:
+    """
+    帧来源基类，read() 返回BGR或BGRA图像，暂时无法获取时返回None。
+    """
+    # 实时来源(窗口截图)允许丢帧，回放来源每一帧都应被处理
+    live = False
+
+    def __init__(self, fps=0, pool=None):
+        # fps 为 0 时不限速，尽可能快地输出
+        self.fps = fps or 0
+        self.pool = pool
+        self.exhausted = False
+        self.last_read_time = None
+        # 最近一次 read() 中限速等待的时间，统计采集耗时时扣除
+        self.last_wait = 0
+
+    def read(self):
+        raise NotImplementedError
+
+    def throttle(self):
+        """
+        按设定帧率等待到下一帧的时间点。
+        """
+        if self.fps <= 0:
+            return
+        interval = 1 / self.fps
+        now = time.perf_counter()
+        self.last_wait = 0
+        if self.last_read_time is not None:
+            wait = self.last_read_time + interval - now
+            if wait > 0:
+                time.sleep(wait)
+                now += wait
+                self.last_wait = wait
+        self.last_read_time = now
+
+    def close(self):
+        pass
+
+
+class WindowFrameSource(FrameSource):
+    """
+    通过Windows GDI截取游戏窗口，返回未转换的BGRA图像，
+    由 FrameContext 只对需要的区域做颜色转换
+    """
+    live = True
+
+    def __init__(self, window_title, fps=0, pool=None):
+        super().__init__(fps, pool)
+        # 仅在使用窗口截图时导入，避免非Windows平台导入失败
+        from tools.grabscreen import GrabScreen
+        self.grab = GrabScreen(pool)
+        self.window_title = window_title
+
+    def read(self):
+        self.throttle()
+        # 未配置缓冲池时原始缓冲跨帧复用，需转换出独立的图像
+        return self.grab.grab_window(self.window_title, convert=self.pool is None)
+
+
+class ImageDirFrameSource(FrameSource):
+    """
+    回放目录中的截图，例如 static/images/cap/
+    """
+    EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+    def __init__(self, path, fps=0, loop=True, pool=None):
+        super().__init__(fps, pool)
+        self.logger = LogManager(name="frame_source")
+        self.path = path
+        self.loop = loop
+        files = sorted(name for name in os.listdir(path) if name.lower().endswith(self.EXTENSIONS))
+        # 预先解码，回放时不计入磁盘读取与解码耗时
+        self.frames = []
+        for name in files:
+            img = cv2.imread(os.path.join(path, name), cv2.IMREAD_COLOR)
+            if img is None:
+                self.logger.error("无法读取截图: %s", name)
+                continue
+            self.frames.append(img)
+        self.index = 0
+        if not self.frames:
+            self.logger.error("目录中没有可回放的截图: %s", path)
+            self.exhausted = True
+
+    def read(self):
+        if self.exhausted:
+            return None
+        if self.index >= len(self.frames):
+            if not self.loop:
+                self.exhausted = True
+                return None
+            self.index = 0
+        self.throttle()
+        img = self.frames[self.index]
+        self.index += 1
+        return img
+
+
+class VideoFrameSource(FrameSource):
+    """
+    回放录制的视频文件
+    """
+    def __init__(self, path, fps=0, loop=True, pool=None):
+        super().__init__(fps, pool)
+        self.logger = LogManager(name="frame_source")
+        self.path = path
+        self.loop = loop
+        self.frame_shape = None
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            self.logger.error("无法打开视频: %s", path)
+            self.exhausted = True
+
+    def read(self):
+        if self.exhausted:
+            return None
+        self.throttle()
+        # 已知帧尺寸后解码到缓冲池中的数组
+        dst = self.pool.acquire(self.frame_shape) if self.pool is not None and self.frame_shape else None
+        ok, img = self.capture.read(dst)
+        if not ok and self.loop:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, img = self.capture.read(dst)
+        if not ok:
+            self.exhausted = True
+            return None
+        self.frame_shape = img.shape
+        return img
+
+    def close(self):
+        self.capture.release()
+
+
+def create_frame_source(source_config, window_title=None, pool=None):
+    """
+    根据配置创建帧来源。
+
+    Args:
+        source_config (dict): frame_source 配置，包含 type/path/fps/loop
+        window_title (str, optional): 窗口截图时的目标窗口标题
+        pool (BufferPool, optional): 帧缓冲池
+
+    Returns:
+        FrameSource: 帧来源
+    """
+    source_config = source_config or {}
+    source_type = source_config.get("type", "window")
+    fps = source_config.get("fps", 0)
+    loop = source_config.get("loop", True)
+    if source_type == "window":
+        return WindowFrameSource(source_config.get("window_title", window_title), fps, pool)
+    if source_type == "images":
+        return ImageDirFrameSource(source_config["path"], fps, loop, pool)
+    if source_type == "video":
+        return VideoFrameSource(source_config["path"], fps, loop, pool)
+    raise ValueError(f"未知的帧来源类型: {source_type}")
@@ -1,6 +1,6 @@
 import cv2
 import numpy as np
-from ctypes import windll, byref, c_ubyte
+from ctypes import windll, byref, c_ubyte, c_void_p
 from ctypes.wintypes import RECT, HWND
 
 
@@ -19,9 +19,14 @@ class GrabScreen:
     DeleteObject = windll.gdi32.DeleteObject
     ReleaseDC = windll.user32.ReleaseDC
 
-    def __init__(self):
+    def __init__(self, pool=None):
         """初始化类并设置DPI识别。"""
         windll.user32.SetProcessDPIAware()
+        # 输出图像从缓冲池复用；未配置缓冲池时位图原始数据缓冲在尺寸不变时跨帧复用
+        self.pool = pool
+        self.raw_size = 0
+        self.raw_buffer = None
+        self.raw_array = None
 
     def capture(self, handle: HWND):
         """捕获窗口客户区截图。"""
@@ -36,18 +41,26 @@ class GrabScreen:
         self.BitBlt(cdc, 0, 0, width, height, dc, 0, 0, self.SRCCOPY)
 
         total_bytes = width * height * 4
-        buffer = bytearray(total_bytes)
-        byte_array = c_ubyte * total_bytes
-        self.GetBitmapBits(bitmap, total_bytes, byte_array.from_buffer(buffer))
+        if self.pool is not None:
+            # 位图数据直接写入缓冲池中的BGRA数组
+            img = self.pool.acquire((height, width, 4))
+            self.GetBitmapBits(bitmap, total_bytes, img.ctypes.data_as(c_void_p))
+        else:
+            if total_bytes != self.raw_size:
+                self.raw_buffer = bytearray(total_bytes)
+                self.raw_array = (c_ubyte * total_bytes).from_buffer(self.raw_buffer)
+                self.raw_size = total_bytes
+            self.GetBitmapBits(bitmap, total_bytes, self.raw_array)
+            img = np.frombuffer(self.raw_buffer, dtype=np.uint8).reshape(height, width, 4)
 
         self.DeleteObject(bitmap)
         self.DeleteObject(cdc)
         self.ReleaseDC(handle, dc)
 
-        return np.frombuffer(buffer, dtype=np.uint8).reshape(height, width, 4)
+        return img
 
-    def grab_window(self, window_name: str):
-        """根据窗口名捕获窗口截图。"""
+    def grab_window(self, window_name: str, convert=True):
+        """根据窗口名捕获窗口截图，convert 为False时返回未转换的BGRA图像。"""
         try:
             hwnd = windll.user32.FindWindowW(None, window_name)
             if hwnd == 0:
@@ -55,8 +68,11 @@ class GrabScreen:
 
             # 使用新的截图方法
             img = self.capture(hwnd)
+            if not convert:
+                return img
 
-            return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+            dst = self.pool.acquire(img.shape[:2] + (3,)) if self.pool is not None else None
+            return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR, dst=dst)
         
         except Exception as e:
             return None
\ No newline at end of file
@@ -1,10 +1,17 @@
-from pynput.keyboard import Key, Listener
 from tools.logger import LogManager
 
+try:
+    from pynput.keyboard import Key, Listener
+except ImportError:
+    # 无图形环境(如Linux分析机)时 pynput 不可用，按键监听被禁用
+    Key = None
+    Listener = None
+
 class KeyListener:
     def __init__(self, interface):
         self.interface = interface
         self.logger = LogManager(name="key_listener")
+        self.listener = None
         
     def on_press(self, key):
         """
@@ -23,7 +30,15 @@ class KeyListener:
                 self.interface.save_current_image()
             elif char == 's':
                 self.interface.toggle_state()
-            elif char == Key.esc:
+            elif char == 'h':
+                self.interface.toggle_preview()
+            elif char == 'm':
+                self.interface.export_metrics()
+            elif char == 'p':
+                self.interface.toggle_profiling()
+            elif char == 'n':
+                self.interface.next_instance()
+            elif Key is not None and char == Key.esc:
                 self.interface.stop()
                 return False  # 停止监听
         except Exception as e:
@@ -33,5 +48,16 @@ class KeyListener:
         """
         启动按键监听
         """
+        if Listener is None:
+            self.logger.warn("pynput 不可用，按键监听未启动")
+            return
         with Listener(on_press=self.on_press) as listener:
+            self.listener = listener
             listener.join()
+
+    def stop(self):
+        """
+        停止按键监听
+        """
+        if self.listener is not None:
+            self.listener.stop()
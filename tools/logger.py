@@ -1,10 +1,232 @@
+import os
+import time
+import queue
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import threading
+import multiprocessing
+from collections import OrderedDict
+from logging.handlers import QueueHandler, RotatingFileHandler
+
+
+class BatchRotatingFileHandler(RotatingFileHandler):
+    """
+    写入后不立即刷新，由写日志线程在每批记录写完后统一刷新
+    """
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    按 (logger名称, 级别, 消息模板) 限制频率，每个时间窗口最多输出 limit 条，
+    超出的被丢弃，并在下一个窗口的第一条消息后注明省略的条数。
+    """
+    def __init__(self, limit=10, interval=1.0, capacity=1024):
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        self.capacity = capacity
+        # 键 -> [窗口开始时间, 窗口内条数, 被省略条数]
+        self.windows = OrderedDict()
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self.lock:
+            window = self.windows.get(key)
+            if window is None:
+                window = self.windows[key] = [now, 0, 0]
+                if len(self.windows) > self.capacity:
+                    self.windows.popitem(last=False)
+            else:
+                self.windows.move_to_end(key)
+            if now - window[0] >= self.interval:
+                window[0], window[1] = now, 0
+            if window[1] >= self.limit:
+                window[2] += 1
+                return False
+            window[1] += 1
+            suppressed, window[2] = window[2], 0
+        if suppressed:
+            record.msg = f"{record.msg} (省略 {suppressed} 条重复消息)"
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    只把日志记录放入队列，队列满时丢弃并计数，不阻塞调用线程。
+    格式化在写日志线程中进行。
+    """
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogBackend:
+    """
+    所有 LogManager 共用的日志后端: 各线程只入队，单个写日志线程格式化并批量写入
+    控制台、调试日志和错误日志，文件在每批写完后刷新一次。
+    """
+    QUEUE_SIZE = 10000
+    BATCH_SIZE = 256
+
+    def __init__(self, debug_path, error_path):
+        for path in (debug_path, error_path):
+            log_dir = os.path.dirname(path)
+            if log_dir and not os.path.exists(log_dir):
+                os.makedirs(log_dir)
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(logging.DEBUG)
+        debug_handler = BatchRotatingFileHandler(
+            debug_path, maxBytes=10 * 1024 * 1024, backupCount=5, encoding='utf-8')
+        debug_handler.setLevel(logging.DEBUG)
+        error_handler = BatchRotatingFileHandler(
+            error_path, maxBytes=10 * 1024 * 1024, backupCount=5, encoding='utf-8')
+        error_handler.setLevel(logging.ERROR)
+        self.handlers = [console_handler, debug_handler, error_handler]
+        for handler in self.handlers:
+            handler.setFormatter(formatter)
+
+        self.queue = queue.Queue(self.QUEUE_SIZE)
+        self.queue_handler = NonBlockingQueueHandler(self.queue)
+        self.queue_handler.addFilter(RateLimitFilter())
+        self.thread = threading.Thread(target=self.writer, name="log-writer", daemon=True)
+        self.thread.start()
+        # 子进程的日志队列及转交线程，首次调用 process_queue 时创建
+        self.lock = threading.Lock()
+        self.process_log_queue = None
+        self.relay_thread = None
+
+    def process_queue(self):
+        """
+        供子进程使用的多进程日志队列，子进程的记录由转交线程放入本进程的日志队列，
+        与本进程的记录一样经过频率限制后由写日志线程写入，日志文件只有一个写入者。
+        """
+        with self.lock:
+            if self.process_log_queue is None:
+                self.process_log_queue = multiprocessing.Queue()
+                self.relay_thread = threading.Thread(target=self.relay, name="log-relay", daemon=True)
+                self.relay_thread.start()
+            return self.process_log_queue
+
+    def relay(self):
+        """
+        转交线程: 把子进程的日志记录交给本进程的队列处理器
+        """
+        while True:
+            record = self.process_log_queue.get()
+            if record is None:
+                break
+            self.queue_handler.handle(record)
+
+    def writer(self):
+        """
+        写日志线程: 取出队列中已有的记录成批写入
+        """
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            for record in batch:
+                if record is None:
+                    running = False
+                    continue
+                for handler in self.handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+            for handler in self.handlers:
+                if isinstance(handler, BatchRotatingFileHandler):
+                    handler.flush_batch()
+                else:
+                    handler.flush()
+
+    def stop(self):
+        """
+        写完队列中剩余的记录后结束写日志线程
+        """
+        if not self.thread.is_alive():
+            return
+        if self.relay_thread is not None and self.relay_thread.is_alive():
+            self.process_log_queue.put(None)
+            self.relay_thread.join(timeout=5)
+        self.queue.put(None)
+        self.thread.join(timeout=5)
+        for handler in self.handlers:
+            handler.close()
+
+
+class ForwardingBackend:
+    """
+    子进程中的日志后端: 记录经多进程队列交给父进程，由父进程的写日志线程写入
+    """
+    def __init__(self, log_queue):
+        # 标准 QueueHandler 入队前合并消息参数，保证记录可以跨进程传递
+        self.queue_handler = QueueHandler(log_queue)
+
+    def stop(self):
+        pass
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend(debug_path, error_path):
+    """
+    获取共用的日志后端，首次调用时按给定路径创建
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = LogBackend(debug_path, error_path)
+            atexit.register(_backend.stop)
+        return _backend
+
+
+def forward_logs(log_queue):
+    """
+    在子进程中调用: 之后的日志都转发到父进程的 LogBackend.process_queue()。
+    fork 启动的子进程继承了父进程已配置的 logger，这些 logger 也改为转发。
+    """
+    global _backend
+    with _backend_lock:
+        inherited = _backend.queue_handler if _backend is not None else None
+        _backend = ForwardingBackend(log_queue)
+    if inherited is None:
+        return
+    for name in list(logging.root.manager.loggerDict):
+        logger = logging.getLogger(name)
+        if inherited in logger.handlers:
+            logger.removeHandler(inherited)
+            logger.addHandler(_backend.queue_handler)
+
 
 class LogManager:
+    # 每个实例记住的 once 消息数量上限，超出时淘汰最早的消息
+    ONCE_CAPACITY = 256
+
     def __init__(self, name="logger", debug_path='log/debug.log', error_path='log/error.log'):
-        self.error_messages_logged = {}
-        self.debug_messages_logged = {}
+        self.error_messages_logged = OrderedDict()
+        self.debug_messages_logged = OrderedDict()
         self.log_debug_filename = debug_path
         self.log_error_filename = error_path
         self.logger = logging.getLogger(name)
@@ -13,40 +235,28 @@ class LogManager:
 
     def setup_logging(self):
         self.logger.setLevel(logging.DEBUG)  # 确保日志级别为 DEBUG
+        # 所有 logger 共用同一个队列处理器，由写日志线程写入控制台和文件
+        backend = get_backend(self.log_debug_filename, self.log_error_filename)
+        self.logger.addHandler(backend.queue_handler)
+        self.logger.propagate = False
 
-        # 创建控制台处理器
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.DEBUG)
-
-        # 创建调试日志处理器，使用 RotatingFileHandler
-        debug_handler = RotatingFileHandler(
-            self.log_debug_filename, maxBytes=10 * 1024 * 1024, backupCount=5, encoding='utf-8')
-        debug_handler.setLevel(logging.DEBUG)
-
-        # 创建错误日志处理器，使用 RotatingFileHandler
-        error_handler = RotatingFileHandler(
-            self.log_error_filename, maxBytes=10 * 1024 * 1024, backupCount=5, encoding='utf-8')
-        error_handler.setLevel(logging.ERROR)
-
-        # 设置日志格式
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        console_handler.setFormatter(formatter)
-        debug_handler.setFormatter(formatter)
-        error_handler.setFormatter(formatter)
-
-        # 添加处理器到 logger
-        self.logger.addHandler(console_handler)
-        self.logger.addHandler(debug_handler)
-        self.logger.addHandler(error_handler)
-
+    def remember(self, messages, message):
+        """
+        记录已输出的消息，返回该消息之前是否已记录过
+        """
+        if message in messages:
+            return True
+        messages[message] = True
+        if len(messages) > self.ONCE_CAPACITY:
+            messages.popitem(last=False)
+        return False
 
     def log_error_once(self, message):
         """
         记录一条错误消息，如果这条消息之前没有被记录过。
         """
-        if message not in self.error_messages_logged:
+        if not self.remember(self.error_messages_logged, message):
             self.logger.error(message)  # 使用特定 logger 记录错误
-            self.error_messages_logged[message] = True
 
     def clear_error_message(self, message):
         """
@@ -59,9 +269,8 @@ class LogManager:
         """
         记录一条调试消息，如果这条消息之前没有被记录过。
         """
-        if message not in self.debug_messages_logged:
+        if not self.remember(self.debug_messages_logged, message):
             self.logger.debug(message)  # 使用特定 logger 记录调试信息
-            self.debug_messages_logged[message] = True
 
     def clear_debug_message(self, message):
         """
@@ -70,6 +279,21 @@ class LogManager:
         if message in self.debug_messages_logged:
             del self.debug_messages_logged[message]
 
+    @staticmethod
+    def process_queue():
+        """
+        供子进程转发日志的队列，子进程中以该队列调用 forward_logs
+        """
+        return get_backend('log/debug.log', 'log/error.log').process_queue()
+
+    @staticmethod
+    def shutdown():
+        """
+        写完队列中剩余的日志，程序退出时调用
+        """
+        if _backend is not None:
+            _backend.stop()
+
     def info(self, message, *args, **kwargs):
         """
         记录一条信息消息
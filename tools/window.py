@@ -1,12 +1,21 @@
-import win32gui
-import win32con
 from tools.logger import LogManager
 
+try:
+    import win32gui
+    import win32con
+except ImportError:
+    # 非Windows平台没有 pywin32，跳过窗口样式设置
+    win32gui = None
+    win32con = None
+
 logger = LogManager(name="window")
 def set_window_style(transparency, window_title):
         """
         设置窗口样式，透明度
         """
+        if win32gui is None:
+            logger.log_debug_once("未安装 pywin32，跳过窗口样式设置")
+            return
         try:
             hwnd = win32gui.FindWindow(None, window_title)
             win32gui.SetWindowPos(hwnd, win32con.HWND_TOPMOST, 0, 0, 0, 0, win32con.SWP_NOMOVE | win32con.SWP_NOSIZE)